@@ -31,7 +31,7 @@ def main():
     # Check dependencies
     try:
         # Prefer importing the converter directly so the local package works without installation
-        from text2ics.converter import process_content
+        from text2ics.converter import aprocess_content
     except Exception:
         # If importing fails, try adding the project root to sys.path so the local package can be imported
         import sys
@@ -41,7 +41,7 @@ def main():
         if repo_root not in sys.path:
             sys.path.insert(0, repo_root)
         try:
-            from text2ics.converter import process_content
+            from text2ics.converter import aprocess_content
         except Exception:
             st.error("❌ Missing dependency: 'text2ics' package not found")
             st.info("💡 To install, run: `pip install -e .` from the project root.")
@@ -57,7 +57,7 @@ def main():
     # Show next steps only if previous steps are completed
     if st.session_state.app_state.config_completed and st.session_state.app_state.input_completed:
         if text_content:
-            render_conversion_section(text_content, api_key, model, language, process_content)
+            render_conversion_section(text_content, api_key, model, language, aprocess_content)
     elif not st.session_state.app_state.config_completed:
         st.info("👆 Please complete Step 1 to continue")
     elif not st.session_state.app_state.input_completed:
@@ -0,0 +1,221 @@
+import asyncio
+import functools
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Optional
+
+if TYPE_CHECKING:
+    from icalendar import Component
+
+STAGES = {
+    "queued": "⏳ Queued",
+    "cache": "🔎 Checking the cache",
+    "calling": "🤖 Calling {model}",
+    "streaming": "📥 Streaming {events} event{s}",
+    "validating": "🧪 Validating the calendar",
+    "done": "✅ Conversion complete",
+    "failed": "❌ Conversion failed",
+    "cancelled": "🛑 Conversion cancelled",
+}
+FINISHED = {"done", "failed", "cancelled"}
+
+ProcessContentFunc = Callable[..., Awaitable[Any]]
+
+
+@dataclass
+class ConversionJob:
+    """
+    A conversion running on the background event loop of text2ics, so the script run
+    that started it returns right away. The stage follows the metrics and events the
+    converter reports; the UI polls it and may cancel the job.
+    """
+
+    content: str
+    api_key: str
+    model: str
+    language: Optional[str]
+    stage: str = "queued"
+    events: list["Component"] = field(default_factory=list["Component"])
+    result: Any = None
+    error: Optional[Exception] = None
+    started: float = field(default_factory=time.time)
+    waited: float = 0.0
+    finished: Optional[float] = None
+    session: str = ""
+    requeued: int = 0
+    on_error: Optional[Callable[["ConversionJob"], bool]] = field(default=None, repr=False)
+    _future: Optional[Future[None]] = field(default=None, repr=False)
+
+    def start(self, process_content_func: ProcessContentFunc) -> Future[None]:
+        """Run ``process_content_func`` (``aprocess_content``) in the background"""
+        from text2ics.converter import background_loop
+
+        self.waited = time.time() - self.started
+        self.stage = "cache"
+        self._future = asyncio.run_coroutine_threadsafe(
+            self._run(process_content_func), background_loop()
+        )
+        return self._future
+
+    async def _run(self, process_content_func: ProcessContentFunc) -> None:
+        try:
+            self.result = await process_content_func(
+                content=self.content,
+                api_key=self.api_key,
+                model=self.model,
+                language=self.language,
+                on_event=self._on_event,
+                on_metric=self._on_metric,
+            )
+            self.stage = "done"
+        except Exception as e:
+            self.error = e
+            # the queue may take the job back before the UI ever sees it failed
+            if self.on_error is None or not self.on_error(self):
+                self.stage = "failed"
+        finally:
+            if self.done:  # not when the queue took the job back
+                self.finished = self.finished or time.time()
+
+    def requeue(self) -> None:
+        """Reset a failed job to wait for another run"""
+        self.requeued += 1
+        self.stage = "queued"
+        self.events, self.error = [], None
+        # time the new run on its own, for the UI and the duration estimates alike
+        self.started, self.finished = time.time(), None
+
+    def _advance(self, stage: str) -> None:
+        if not self.done:  # a cancelled job may still report until the loop stops it
+            self.stage = stage
+
+    def _on_event(self, event: "Component") -> None:
+        self.events.append(event)
+        self._advance("streaming")
+
+    def _on_metric(self, metric: str, data: dict[str, Any]) -> None:
+        if metric == "prompt_build":
+            self._advance("calling")
+        elif metric == "llm_call":
+            self._advance("validating")
+        elif metric == "validation" and data["outcome"] == "regenerated":
+            self._advance("calling")
+
+    def cancel(self) -> None:
+        if self.done:
+            return
+        self.stage = "cancelled"
+        self.finished = time.time()
+        if self._future is not None:
+            self._future.cancel()
+
+    @property
+    def done(self) -> bool:
+        return self.stage in FINISHED
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished or time.time()) - self.started
+
+    def describe(self) -> str:
+        """The stage as a label for the UI"""
+        count = len(self.events)
+        return STAGES[self.stage].format(
+            model=self.model, events=count, s="s" if count != 1 else ""
+        )
+
+
+class JobQueue:
+    """
+    The conversions of all sessions, at most ``workers`` of them running at a time.
+
+    Sessions take turns: the next job to start is the oldest one of the session that
+    has waited longest since its last job started, so one session cannot hold up the
+    others with many jobs. Under load conversions wait here rather than all hitting the
+    provider at once, and a conversion that still fails with a rate limit error after
+    the retries of the converter is queued again, up to ``max_requeues`` times.
+    """
+
+    def __init__(
+        self, process_content_func: ProcessContentFunc, workers: int = 4, max_requeues: int = 3
+    ):
+        self.workers = workers
+        self.max_requeues = max_requeues
+        self._process_content_func = process_content_func
+        self._sessions: OrderedDict[str, deque[ConversionJob]] = OrderedDict()
+        self._running = 0
+        self._durations: deque[float] = deque(maxlen=20)
+        self._lock = threading.RLock()  # a job may finish while it is being dispatched
+
+    def submit(self, session: str, job: ConversionJob) -> ConversionJob:
+        """Queue ``job`` for ``session``, starting it right away if a worker is free"""
+        job.session, job.on_error = session, self._retry
+        with self._lock:
+            self._sessions.setdefault(session, deque()).append(job)
+            self._dispatch()
+        return job
+
+    def _dispatch(self) -> None:
+        while self._running < self.workers and (job := self._next()) is not None:
+            self._running += 1
+            future = job.start(self._process_content_func)
+            future.add_done_callback(functools.partial(self._finished, job))
+
+    def _next(self) -> Optional[ConversionJob]:
+        while self._sessions:
+            session, jobs = next(iter(self._sessions.items()))
+            job = jobs.popleft()
+            if jobs:
+                self._sessions.move_to_end(session)
+            else:
+                del self._sessions[session]
+            if not job.done:  # skip jobs cancelled while queued
+                return job
+        return None
+
+    def _finished(self, job: ConversionJob, future: Future[None]) -> None:
+        with self._lock:
+            self._running -= 1
+            if job.stage == "done":
+                self._durations.append(job.elapsed - job.waited)
+            self._dispatch()
+
+    def _retry(self, job: ConversionJob) -> bool:
+        """Queue a job that failed on a rate limit again, while it has requeues left"""
+        from litellm.exceptions import RateLimitError
+
+        if not isinstance(job.error, RateLimitError) or job.requeued >= self.max_requeues:
+            return False
+        with self._lock:
+            # the provider is saturated: wait in line again instead of failing
+            job.requeue()
+            self._sessions.setdefault(job.session, deque()).append(job)
+        return True
+
+    def _order(self) -> list[ConversionJob]:
+        """The queued jobs in the order they will start"""
+        queues = [[job for job in jobs if not job.done] for jobs in self._sessions.values()]
+        return [
+            queue[turn]
+            for turn in range(max(map(len, queues), default=0))
+            for queue in queues
+            if turn < len(queue)
+        ]
+
+    def position(self, job: ConversionJob) -> int:
+        """The number of jobs that start before ``job``"""
+        with self._lock:
+            order = self._order()
+        return order.index(job) if job in order else 0
+
+    @property
+    def average_duration(self) -> float:
+        """Mean run time of the recent conversions, or a guess before the first one"""
+        return sum(self._durations) / len(self._durations) if self._durations else 10.0
+
+    def estimated_wait(self, job: ConversionJob) -> float:
+        """Seconds until ``job`` is expected to start, when all workers stay busy"""
+        return (self.position(job) + 1) * self.average_duration / self.workers
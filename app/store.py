@@ -0,0 +1,85 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+# text2ics is imported on use, after app.py has made sure it can be found
+
+
+def store_key(content: str, api_key: str, model: str, language: Optional[str]) -> str:
+    """
+    Key a conversion by the hash of its inputs and of the API key it was made with,
+    so neither the text nor the key is kept in memory.
+
+    >>> store_key("24/9 - Intro", "sk-1", "gpt-5", None) == store_key(
+    ...     "24/9 - Intro", "sk-2", "gpt-5", None
+    ... )
+    False
+    """
+    from text2ics.cache import cache_key
+
+    identity = hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+    return f"{identity}:{cache_key(content, model, language)}"
+
+
+class ResultStore:
+    """
+    In-memory LRU store of converted calendars as ICS bytes, shared by all sessions.
+
+    The total size of the stored ICS is kept under ``max_bytes`` by evicting the least
+    recently used entries, and entries older than ``max_age`` seconds are dropped, so
+    memory stays flat however many distinct inputs are converted.
+
+    >>> store = ResultStore(max_bytes=10)
+    >>> store.put("a", b"123456")
+    >>> store.put("b", b"1234")
+    >>> store.get("a")
+    b'123456'
+    >>> store.put("c", b"12")
+    >>> store.get("b") is None, store.size, len(store)
+    (True, 8, 2)
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, max_age: Optional[float] = 3600):
+        from text2ics.cache import CacheStats
+
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.stats = CacheStats()
+        self.size = 0
+        self._entries: OrderedDict[str, tuple[bytes, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.max_age is not None:
+                if time.time() - entry[1] > self.max_age:
+                    self._remove(key)
+                    entry = None
+            if entry is None:
+                self.stats.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+            return entry[0]
+
+    def put(self, key: str, ics: bytes) -> None:
+        if len(ics) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (ics, time.time())
+            self.size += len(ics)
+            while self.size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.stats.evictions += 1
+
+    def _remove(self, key: str) -> None:
+        ics, _ = self._entries.pop(key)
+        self.size -= len(ics)
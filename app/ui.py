@@ -1,20 +1,30 @@
 import base64
 import hashlib
-import io
 import os
 import time
+from typing import TYPE_CHECKING, Optional
 
-import qrcode
 import streamlit as st
+from jobs import ConversionJob, JobQueue, ProcessContentFunc
 from streamlit_calendar import calendar
 from style import bmac_html, css
 from utils import (
+    cached_result,
     get_file_content,
-    ical_to_streamlit_calendar,
-    process_content_cached,
+    job_queue,
+    remember_result,
+    result_store,
+    session_id,
     validate_api_key,
 )
 
+if TYPE_CHECKING:
+    from icalendar import Component
+    from streamlit.delta_generator import DeltaGenerator
+
+    from text2ics.metrics import ConversionProfile
+    from text2ics.result import CalendarPreview
+
 calendar_options = {
     "editable": "true",
     "navLinks": "true",
@@ -294,12 +304,126 @@ def render_input_section():
     return manual_text, uploaded_file
 
 
+def render_streamed_events(placeholder: "DeltaGenerator", events: list["Component"]) -> None:
+    """Show the events received so far while the conversion is still running"""
+    lines = [f"📥 **{len(events)} event{'s' if len(events) != 1 else ''} received so far**"]
+    for event in events[-10:]:
+        lines.append(f"- {event.get('SUMMARY', '(untitled)')}")
+    placeholder.markdown("\n".join(lines))
+
+
+def cache_status(converter_cache: str, app_cache_hit: bool) -> str:
+    """Describe where the result came from"""
+    if app_cache_hit:
+        return "⚡ Cache Hit (app)"
+    if converter_cache == "hit":
+        return "⚡ Cache Hit"
+    if converter_cache == "coalesced":
+        return "🤝 Shared with an identical conversion in progress"
+    if converter_cache == "skipped":
+        return "⚡ Converted locally"
+    return "🔄 New Generation"
+
+
+def render_profile(profile: "ConversionProfile") -> None:
+    """Show where the time of the last conversion went"""
+    app_state = st.session_state.app_state
+    totals = profile.to_dict()["totals"]
+    cached = f" ({totals['cached_token_ratio']:.0%} cached)" if totals["cached_tokens"] else ""
+    st.markdown(
+        f'<div class="status-indicator status-info">{app_state.last_cache_status} • '
+        f"{app_state.last_processing_time:.2f}s • {totals['llm_calls']} LLM call(s) • "
+        f"{totals['input_tokens']} → {totals['output_tokens']} tokens{cached}</div>",
+        unsafe_allow_html=True,
+    )
+    with st.expander("⏱️ Conversion profile", expanded=False):
+        st.json(profile.to_dict())
+        store = result_store()
+        st.caption(
+            f"Result store: {len(store)} calendars, {store.size / 2**20:.1f} of "
+            f"{store.max_bytes / 2**20:.0f} MiB, {store.stats.hit_rate:.0%} hit rate"
+        )
+
+
+@st.fragment(run_every=0.3)
+def render_conversion_progress(queue: JobQueue) -> None:
+    """Poll the background conversion, showing its stage and the events streamed so far"""
+    job: Optional[ConversionJob] = st.session_state.get("conversion_job")
+    if job is None:
+        return
+    if job.done:
+        finish_conversion(job)
+        st.rerun()
+
+    label = f"{job.describe()} • {job.elapsed:.1f}s"
+    if job.stage == "queued":
+        label += f" • #{queue.position(job) + 1} in line, ~{queue.estimated_wait(job):.0f}s left"
+    with st.status(label, expanded=bool(job.events)):
+        if job.events:
+            render_streamed_events(st.empty(), list(job.events))
+    if st.button("✋ Cancel", key="cancel_conversion"):
+        job.cancel()
+        finish_conversion(job)
+        st.rerun()
+
+
+def render_calendar_preview(preview: "CalendarPreview") -> None:
+    """
+    Render one month of the preview at a time, so only its events are sent to the
+    calendar component however large the calendar is
+    """
+    months = preview.months
+    if not months:
+        calendar(events=[], options=calendar_options, key="calendarview")
+        return
+    month = st.session_state.get("preview_month")
+    if month not in months:
+        # start at the first month with events from now on
+        today = time.strftime("%Y-%m")
+        month = next((month for month in months if month >= today), months[-1])
+    index = months.index(month)
+
+    def page(step: int) -> None:
+        st.session_state["preview_month"] = months[index + step]
+
+    previous, label, following = st.columns([1, 4, 1])
+    previous.button("◀", key="preview_previous", disabled=index == 0, on_click=page, args=(-1,))
+    following.button(
+        "▶", key="preview_next", disabled=index == len(months) - 1, on_click=page, args=(1,)
+    )
+
+    events = preview.month(month)
+    label.markdown(
+        f"**{time.strftime('%B %Y', time.strptime(month, '%Y-%m'))}**: "
+        f"{len(events)} of {len(preview)} events, month {index + 1} of {len(months)}"
+    )
+    calendar(
+        events=events,
+        options={**calendar_options, "initialDate": f"{month}-01"},
+        key=f"calendarview-{month}",
+    )
+
+
+def finish_conversion(job: ConversionJob) -> None:
+    """Move the outcome of a finished job into the session state"""
+    del st.session_state["conversion_job"]
+    if job.stage == "failed":
+        st.session_state["conversion_error"] = str(job.error) or type(job.error).__name__
+    elif job.stage == "done":
+        remember_result(job.content, job.api_key, job.model, job.language, job.result)
+        st.session_state["ics_content"] = job.result
+        st.session_state.app_state.last_processing_time = job.elapsed
+        st.session_state.app_state.last_cache_status = cache_status(
+            job.result.profile.cache, app_cache_hit=False
+        )
+
+
 def render_conversion_section(
     text_content: str,
     api_key: str,
     model: str,
     language: str,
-    process_content_func,
+    process_content_func: ProcessContentFunc,
 ) -> None:
     """Render conversion section"""
     if not text_content or not api_key:
@@ -327,87 +451,65 @@ def render_conversion_section(
     # conversion button
     if st.button(
         "🚀 Generate ICS Calendar",
-        disabled=not ready_to_convert,
+        disabled=not ready_to_convert or "conversion_job" in st.session_state,
         use_container_width=True,
         key="convert_button",
         type="primary" if not st.session_state.app_state.conversion_started else "secondary",
     ):
         # Mark conversion as started - this will cause section 2 to collapse
         st.session_state.app_state.conversion_started = True
-
-        # Show progress
-        progress_bar = st.progress(0)
-        status_text = st.empty()
-
-        try:
-            status_text.text("🔄 Initializing conversion...")
-            progress_bar.progress(25)
-            time.sleep(0.5)
-
-            status_text.text("🤖 Processing...")
-            progress_bar.progress(50)
-
-            # Track timing for cache feedback
-            start_time = time.time()
-
-            ics_content = process_content_cached(
-                text_content,
-                api_key,
-                model,
-                language if language else None,
-                process_content_func,
+        st.session_state.pop("conversion_error", None)
+
+        output_language = language if language else None
+        if result := cached_result(text_content, api_key, model, output_language):
+            st.session_state["ics_content"] = result
+            st.session_state.app_state.last_processing_time = 0.0
+            st.session_state.app_state.last_cache_status = cache_status(
+                result.profile.cache, app_cache_hit=True
+            )
+        else:
+            # convert in the background, so this run (and every rerun) returns right away;
+            # the queue shared with the other sessions decides when the conversion starts
+            st.session_state["conversion_job"] = job_queue(process_content_func).submit(
+                session_id(), ConversionJob(text_content, api_key, model, output_language)
             )
-            st.session_state["ics_content"] = ics_content
-            processing_time = time.time() - start_time
-
-            # Update debug info
-            st.session_state.app_state.last_processing_time = processing_time
-            if processing_time < 1.0:
-                st.session_state.app_state.last_cache_status = "⚡ Cache Hit"
-            else:
-                st.session_state.app_state.last_cache_status = "🔄 New Generation"
-
-            progress_bar.progress(75)
-            status_text.text("📅 Generating calendar...")
-            time.sleep(0.5)
 
-            progress_bar.progress(100)
-            status_text.text("✅ Conversion complete!")
+    if "conversion_job" in st.session_state:
+        render_conversion_progress(job_queue(process_content_func))
 
-        except Exception as e:
-            st.error(f"❌ Conversion failed: {str(e)}")
-            st.info("💡 Try checking your API key or simplifying the input text")
-            st.markdown("</div>", unsafe_allow_html=True)
-            return
+    if error := st.session_state.get("conversion_error"):
+        st.error(f"❌ Conversion failed: {error}")
+        st.info("💡 Try checking your API key or simplifying the input text")
 
-    if ics_content := st.session_state.get("ics_content"):
+    # the result lives in the session state, so its serializations are computed only once
+    if result := st.session_state.get("ics_content"):
         # Display results with calendar preview
         st.subheader("📋 Generated Calendar")
         with st.expander("📅 Preview of generated calendar", expanded=True):
-            json_events = ical_to_streamlit_calendar(ics_content)
-            calendar(
-                events=json_events,
-                options=calendar_options,
-                key="calendarview",
-            )
+            render_calendar_preview(result.preview)
+            events = f"event{'s' if result.event_count > 1 else ''}"
+            qr_png = result.qr_png
             st.subheader(
-                "Download file or scan QR to get the event"
-                f"{'s' if len(ics_content.events) > 1 else ''}"
+                f"Download file or scan QR to get the {events}"
+                if qr_png
+                else f"Download the file to get the {events}"
             )
 
             st.download_button(
                 label="💾 Download Calendar File",
-                data=ics_content.to_ical(),
+                data=result.ics,
                 help="Open the downloaded file to quickly add it to your calendar",
                 file_name=f"calendar_{int(time.time())}.ics",
                 mime="text/calendar",
                 use_container_width=True,
                 type="primary",
             )
-            with io.BytesIO() as image_stream:
-                qrcode.make(ics_content.to_ical()).save(image_stream, format="PNG")
-                st.image(image_stream)
+            if qr_png:
+                st.image(qr_png)
+            else:
+                st.caption("The calendar is too large to fit in a QR code.")
 
         # Success message
         st.success("🎉 Calendar generated successfully!")
+        render_profile(result.profile)
     st.markdown("</div>", unsafe_allow_html=True)
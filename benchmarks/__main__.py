@@ -0,0 +1,294 @@
+"""
+Offline benchmarks of the conversion pipeline.
+
+Runs the library, streaming, fast path, batch and CLI paths against the local fake
+provider on synthetic inputs and reports throughput, latency percentiles and memory:
+
+    python -m benchmarks --sizes 1,10,100 --latency 0.2 --invalid-rate 0.1
+"""
+
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Callable
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Annotated, Any
+
+import typer
+from rich.console import Console
+from rich.table import Table
+
+if TYPE_CHECKING:
+    from text2ics.converter import EventCallback
+    from text2ics.ratelimit import AdaptiveRateLimiter
+
+SCENARIOS = ["convert", "stream", "fast-path", "batch", "cli"]
+
+
+@dataclass
+class BenchmarkResult:
+    """Measurements of one scenario at one input size"""
+
+    scenario: str
+    size: int
+    runs: int = 0
+    failures: int = 0
+    events: int = 0
+    latencies: list[float] = field(default_factory=list[float])
+    wall: float = 0.0
+    peak_memory: int = 0
+
+    @property
+    def throughput(self) -> float:
+        """Converted events per second"""
+        return self.events / self.wall if self.wall else 0.0
+
+    def percentile(self, q: int) -> float:
+        if len(self.latencies) < 2:
+            return self.latencies[0] if self.latencies else 0.0
+        return statistics.quantiles(self.latencies, n=100, method="inclusive")[q - 1]
+
+    def to_dict(self) -> dict[str, Any]:
+        result = asdict(self)
+        del result["latencies"]
+        result |= {
+            "throughput": self.throughput,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+        }
+        return result
+
+
+def _measure(result: BenchmarkResult, run: Callable[[], int]) -> None:
+    """Time ``run`` (returning its event count) and record it on ``result``"""
+    start = time.perf_counter()
+    try:
+        result.events += run()
+    except Exception:
+        result.failures += 1
+    result.latencies.append(time.perf_counter() - start)
+    result.runs += 1
+
+
+def bench_library(
+    scenario: str,
+    size: int,
+    repeat: int,
+    language: str,
+    limiter: "AdaptiveRateLimiter | None",
+    seed: int,
+    hedge_delay: float | None = None,
+) -> BenchmarkResult:
+    from benchmarks.corpus import generate
+    from benchmarks.fake_provider import FAKE_MODEL, HEDGE_MODEL
+    from text2ics.converter import process_content
+
+    result = BenchmarkResult(scenario, size)
+    style = "schedule" if scenario == "fast-path" else "prose"
+    text = generate(size, language, style, seed=seed).text
+    on_event: EventCallback | None = (lambda event: None) if scenario == "stream" else None
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    for _ in range(repeat):
+        _measure(
+            result,
+            lambda: (
+                process_content(
+                    text,
+                    "fake-key",
+                    FAKE_MODEL,
+                    limiter=limiter,
+                    fast_path=scenario == "fast-path",
+                    on_event=on_event,
+                    hedge_model=None if hedge_delay is None else HEDGE_MODEL,
+                    hedge_delay=hedge_delay or 0.0,
+                ).event_count
+            ),
+        )
+    result.wall = time.perf_counter() - started
+    result.peak_memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result
+
+
+def bench_batch(
+    size: int,
+    files: int,
+    concurrency: int,
+    language: str,
+    limiter: "AdaptiveRateLimiter | None",
+    seed: int,
+) -> BenchmarkResult:
+    from benchmarks.corpus import generate
+    from benchmarks.fake_provider import FAKE_MODEL
+    from text2ics.batch import convert_files
+
+    result = BenchmarkResult("batch", size)
+    with tempfile.TemporaryDirectory() as directory:
+        paths: list[Path] = []
+        for number in range(files):
+            path = Path(directory) / f"input-{number}.txt"
+            path.write_text(generate(size, language, seed=seed + number).text, encoding="utf-8")
+            paths.append(path)
+
+        async def run() -> None:
+            async for converted in convert_files(
+                paths, "fake-key", FAKE_MODEL, concurrency=concurrency, limiter=limiter
+            ):
+                result.runs += 1
+                result.latencies.append(converted.elapsed)
+                if converted.ok:
+                    result.events += converted.event_count
+                else:
+                    result.failures += 1
+
+        tracemalloc.start()
+        started = time.perf_counter()
+        asyncio.run(run())
+        result.wall = time.perf_counter() - started
+        result.peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return result
+
+
+def bench_cli(
+    size: int, repeat: int, language: str, provider: dict[str, Any], seed: int
+) -> BenchmarkResult:
+    from benchmarks.corpus import generate
+    from benchmarks.fake_provider import FAKE_MODEL
+
+    result = BenchmarkResult("cli", size)
+    env = os.environ | {"TEXT2ICS_FAKE_PROVIDER": json.dumps(provider)}
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "input.txt"
+        path.write_text(generate(size, language, seed=seed).text, encoding="utf-8")
+        command = [sys.executable, "-m", "benchmarks.cli", str(path)]
+        command += ["--api-key", "fake-key", "--model", FAKE_MODEL, "--no-cache"]
+
+        started = time.perf_counter()
+        for _ in range(repeat):
+            start = time.perf_counter()
+            process = subprocess.Popen(
+                command, env=env, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+            )
+            output = process.stdout.read() if process.stdout else b""
+            _, status, usage = os.wait4(process.pid, 0)
+            process.returncode = os.waitstatus_to_exitcode(status)
+            result.latencies.append(time.perf_counter() - start)
+            result.runs += 1
+            # ru_maxrss is in kilobytes on Linux
+            result.peak_memory = max(result.peak_memory, usage.ru_maxrss * 1024)
+            if process.returncode:
+                result.failures += 1
+            else:
+                result.events += output.count(b"BEGIN:VEVENT")
+        result.wall = time.perf_counter() - started
+    return result
+
+
+def report(results: list[BenchmarkResult]) -> Table:
+    table = Table(title="text2ics benchmarks")
+    for column in ["Scenario", "Events", "Runs", "Failed", "Events/s", "p50", "p95", "p99"]:
+        table.add_column(column, justify="left" if column == "Scenario" else "right")
+    table.add_column("Peak memory", justify="right")
+    for result in results:
+        table.add_row(
+            result.scenario,
+            str(result.size),
+            str(result.runs),
+            str(result.failures),
+            f"{result.throughput:.1f}",
+            f"{result.percentile(50):.3f}s",
+            f"{result.percentile(95):.3f}s",
+            f"{result.percentile(99):.3f}s",
+            f"{result.peak_memory / 2**20:.1f} MiB",
+        )
+    return table
+
+
+def main(
+    scenarios: Annotated[
+        str, typer.Option(help=f"Comma separated scenarios out of {','.join(SCENARIOS)}.")
+    ] = ",".join(SCENARIOS),
+    sizes: Annotated[str, typer.Option(help="Comma separated numbers of events.")] = "1,10,100",
+    repeat: Annotated[int, typer.Option(min=1, help="Runs per scenario and size.")] = 5,
+    language: Annotated[str, typer.Option(help="Language of the synthetic texts (da, en).")] = "da",
+    files: Annotated[int, typer.Option(min=1, help="Number of inputs in the batch.")] = 20,
+    concurrency: Annotated[int, typer.Option(min=1, help="Batch concurrency.")] = 8,
+    rate: Annotated[
+        float | None,
+        typer.Option(help="Requests per second of the rate limiter. Defaults to the real one."),
+    ] = None,
+    latency: Annotated[float, typer.Option(help="Fake time to first token (s).")] = 0.05,
+    slow_rate: Annotated[float, typer.Option(help="Share of very slow responses.")] = 0.0,
+    slow_latency: Annotated[float, typer.Option(help="Time to first token of those (s).")] = 5.0,
+    hedge_delay: Annotated[
+        float | None,
+        typer.Option(help="Hedge library conversions with a second fake model after this delay."),
+    ] = None,
+    tokens_per_second: Annotated[float, typer.Option(help="Fake output speed.")] = 2000.0,
+    rate_limit_rate: Annotated[float, typer.Option(help="Share of 429 responses.")] = 0.0,
+    error_rate: Annotated[float, typer.Option(help="Share of 500 responses.")] = 0.0,
+    invalid_rate: Annotated[float, typer.Option(help="Share of answers with a bad VEVENT.")] = 0.0,
+    garbage_rate: Annotated[float, typer.Option(help="Share of answers without ICS.")] = 0.0,
+    seed: Annotated[int, typer.Option(help="Seed of the corpus and the fake provider.")] = 0,
+    json_output: Annotated[
+        bool, typer.Option("--json", help="Print the results as JSON instead of a table.")
+    ] = False,
+):
+    """
+    Benchmark the conversion pipeline offline against a fake LLM provider.
+    """
+    from benchmarks.fake_provider import FakeProvider, install
+    from text2ics.ratelimit import AdaptiveRateLimiter
+
+    provider: dict[str, Any] = dict(
+        latency=latency,
+        slow_rate=slow_rate,
+        slow_latency=slow_latency,
+        tokens_per_second=tokens_per_second,
+        rate_limit_rate=rate_limit_rate,
+        error_rate=error_rate,
+        invalid_rate=invalid_rate,
+        garbage_rate=garbage_rate,
+        seed=seed,
+    )
+    install(FakeProvider(**provider))
+    limiter = None
+    if rate is not None:
+        limiter = AdaptiveRateLimiter(
+            rate=rate, burst=int(rate) + 1, concurrency=64, max_rate=rate, max_concurrency=1024
+        )
+
+    console = Console(stderr=True)
+    results: list[BenchmarkResult] = []
+    for scenario in scenarios.split(","):
+        if scenario not in SCENARIOS:
+            raise typer.BadParameter(f"Unknown scenario {scenario!r}", param_hint="--scenarios")
+        for size in (int(size) for size in sizes.split(",")):
+            console.print(f"Running {scenario} with {size} event(s)...")
+            if scenario == "batch":
+                result = bench_batch(size, files, concurrency, language, limiter, seed)
+            elif scenario == "cli":
+                result = bench_cli(size, repeat, language, provider, seed)
+            else:
+                result = bench_library(scenario, size, repeat, language, limiter, seed, hedge_delay)
+            results.append(result)
+
+    if json_output:
+        typer.echo(json.dumps([result.to_dict() for result in results], indent=2))
+    else:
+        Console().print(report(results))
+
+
+if __name__ == "__main__":
+    typer.run(main)
@@ -0,0 +1,21 @@
+"""
+Run the text2ics CLI against the fake provider, for benchmarking it as a subprocess.
+
+The provider is configured by the JSON object in ``TEXT2ICS_FAKE_PROVIDER``, holding
+keyword arguments of :class:`~benchmarks.fake_provider.FakeProvider`.
+"""
+
+import json
+import os
+
+
+def main() -> None:
+    from benchmarks.fake_provider import FakeProvider, install
+    from text2ics.cli import app
+
+    install(FakeProvider(**json.loads(os.environ.get("TEXT2ICS_FAKE_PROVIDER", "{}"))))
+    app()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Generator of synthetic Danish and English event texts for the benchmarks.
+
+Texts look like the mails and schedules text2ics is used on: a greeting, events
+described in prose (one per line, with a date and usually a time) and paragraphs of
+boilerplate in between. The ``schedule`` style writes the events in the documented
+``24/9 - Title kl. 19-21`` line format instead, which the fast path converts locally.
+"""
+
+import random
+from dataclasses import dataclass
+
+_TITLES = {
+    "da": [
+        "Generalforsamling", "Yoga for begyndere", "Forældremøde", "Julefrokost",
+        "Loppemarked", "Koncert i kirken", "Bestyrelsesmøde", "Fællesspisning",
+        "Færge til Endelave", "Tandlæge", "Fodboldtræning", "Sommerfest",
+    ],
+    "en": [
+        "Annual general meeting", "Beginner yoga", "Parent meeting", "Christmas party",
+        "Flea market", "Church concert", "Board meeting", "Community dinner",
+        "Ferry to Endelave", "Dentist", "Football practice", "Summer party",
+    ],
+}  # fmt: skip
+_WEEKDAYS = {
+    "da": ["mandag", "tirsdag", "onsdag", "torsdag", "fredag", "lørdag", "søndag"],
+    "en": ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"],
+}
+_PROSE = {
+    "da": [
+        "Vi ses til {title} {weekday} d. {day}/{month} kl. {hour}.{minute}",
+        "Husk {title} {weekday} den {day}/{month} fra kl. {hour}.{minute}",
+        "{title}: {weekday} {day}/{month} kl. {hour}.{minute} i salen",
+    ],
+    "en": [
+        "Join us for {title} on {weekday} {day}/{month} at {hour}:{minute}",
+        "Reminder: {title} takes place {weekday} {day}/{month} from {hour}:{minute}",
+        "{title} - {weekday} {day}/{month} at {hour}:{minute} in the main hall",
+    ],
+}
+_BOILERPLATE = {
+    "da": [
+        "Tak for din tilmelding, vi glæder os til at se dig.",
+        "Husk at medbringe din bekræftelse på dagen.",
+        "Spørgsmål kan rettes til sekretariatet på mail eller telefon.",
+        "Vi gør opmærksom på at der ikke er parkering ved indgangen.",
+        "Med venlig hilsen bestyrelsen",
+    ],
+    "en": [
+        "Thank you for signing up, we look forward to seeing you.",
+        "Please bring your confirmation on the day.",
+        "Questions can be sent to the office by mail or phone.",
+        "Please note that there is no parking at the entrance.",
+        "Kind regards, the board",
+    ],
+}
+_GREETING = {"da": "Kære medlem", "en": "Dear member"}
+
+
+@dataclass
+class SyntheticText:
+    """A generated input and the number of events it describes"""
+
+    text: str
+    events: int
+    language: str
+    style: str
+
+
+def generate(
+    events: int,
+    language: str = "da",
+    style: str = "prose",
+    boilerplate: int = 2,
+    seed: int = 0,
+) -> SyntheticText:
+    """
+    Generate a text describing ``events`` distinct events.
+
+    ``boilerplate`` lines of filler follow every event line in the ``prose`` style.
+
+    >>> sample = generate(2, language="en", seed=1)
+    >>> sample.events, sample.text.splitlines()[0]
+    (2, 'Dear member')
+    >>> print(generate(2, style="schedule", seed=1).text)
+    Kære medlem
+    <BLANKLINE>
+    5/10 - Yoga for begyndere kl. 12-14
+    4/8 - Fællesspisning kl. 15-17
+    """
+    rng = random.Random(seed)
+    lines = [_GREETING[language], ""]
+    used: set[tuple[int, int, str]] = set()
+    for number in range(events):
+        while True:
+            day, month = rng.randint(1, 28), rng.randint(1, 12)
+            title = rng.choice(_TITLES[language])
+            if events > 300:  # make titles distinct once the combinations run out
+                title = f"{title} {number + 1}"
+            if (day, month, title) not in used:
+                used.add((day, month, title))
+                break
+        hour = rng.randint(8, 20)
+
+        if style == "schedule":
+            lines.append(f"{day}/{month} - {title} kl. {hour}-{hour + 2}")
+            continue
+        template = rng.choice(_PROSE[language])
+        lines.append(
+            template.format(
+                title=title,
+                weekday=rng.choice(_WEEKDAYS[language]),
+                day=day,
+                month=month,
+                hour=hour,
+                minute=rng.choice(["00", "15", "30", "45"]),
+            )
+        )
+        lines.extend(rng.choice(_BOILERPLATE[language]) for _ in range(boilerplate))
+        lines.append("")
+    return SyntheticText("\n".join(lines).rstrip("\n"), events, language, style)
@@ -0,0 +1,209 @@
+"""
+A local stand-in for the LLM provider, registered with litellm as ``text2ics-fake``.
+
+The fake reads the ``<INPUT>`` of the prompt and answers with one VEVENT per line that
+carries a date, so conversions produce realistic calendars without network access.
+Latency, token rate and failures are configurable:
+
+- ``latency``: seconds before the first token
+- ``slow_rate``: share of requests waiting ``slow_latency`` seconds instead (tail latency)
+- ``tokens_per_second``: output speed; streamed answers are paced chunk by chunk
+- ``rate_limit_rate``: share of requests rejected with a 429 and a ``retry-after-ms``
+- ``error_rate``: share of requests failing with a 500
+- ``invalid_rate``: share of answers with a broken VEVENT (``DTSTART:notadate``)
+- ``garbage_rate``: share of answers without any usable ICS at all
+
+Like the real providers, the fake caches prompt prefixes: the messages up to the last one
+marked with ``cache_control`` count as cached input tokens once they have been seen.
+
+Use it by calling :func:`install` and converting with ``model=FAKE_MODEL``; any other
+``text2ics-fake/...`` model, like ``HEDGE_MODEL``, is answered the same way.
+"""
+
+import asyncio
+import random
+import re
+import time
+from collections.abc import AsyncIterator
+from dataclasses import dataclass, field
+from typing import Any
+
+import httpx
+import litellm
+from litellm.exceptions import InternalServerError, RateLimitError
+from litellm.llms.custom_llm import CustomLLM
+from litellm.types.utils import ChatCompletionUsageBlock, GenericStreamingChunk, ModelResponse
+
+from text2ics.relevance import estimate_tokens
+
+PROVIDER = "text2ics-fake"
+FAKE_MODEL = f"{PROVIDER}/ics"
+HEDGE_MODEL = f"{PROVIDER}/hedge"
+
+_DATE = re.compile(r"\b(?P<day>\d{1,2})[./-](?P<month>\d{1,2})(?:[./-](?P<year>\d{4}))?\b")
+_TIME = re.compile(r"\b(?P<hour>\d{1,2})[:.](?P<minute>\d{2})\b")
+_INPUT = re.compile(r"<INPUT>((?:(?!<INPUT>).)*?)</INPUT>", re.DOTALL)
+
+
+def render_calendar(prompt: str, year: int = 2026) -> str:
+    """
+    Render the calendar a well-behaved model would produce for ``prompt``.
+
+    >>> print(render_calendar("<INPUT>Intro on 24/9 at 19:00\\nNo date here</INPUT>"))
+    ... # doctest: +NORMALIZE_WHITESPACE
+    BEGIN:VCALENDAR
+    VERSION:2.0
+    PRODID:-//text2ics//fake//EN
+    BEGIN:VEVENT
+    UID:fake-1-0924@text2ics
+    DTSTAMP:20260101T000000Z
+    SUMMARY:Intro on 24/9 at 19:00
+    DTSTART;TZID=Europe/Copenhagen:20260924T190000
+    DURATION:PT1H
+    END:VEVENT
+    END:VCALENDAR
+    """
+    # the last <INPUT> is the text to convert; fix prompts carry one per broken event
+    inputs = _INPUT.findall(prompt) or [prompt]
+    text = "\n".join(inputs if "<EVENT>" in prompt else inputs[-1:])
+
+    lines = ["BEGIN:VCALENDAR", "VERSION:2.0", "PRODID:-//text2ics//fake//EN"]
+    dated = ((line.strip(), date) for line in text.splitlines() if (date := _DATE.search(line)))
+    for number, (line, date) in enumerate(dated, start=1):
+        try:
+            day, month = int(date["day"]), int(date["month"])
+            stamp = f"{int(date['year'] or year):04d}{month:02d}{day:02d}"
+        except ValueError:
+            continue
+        if not (1 <= day <= 31 and 1 <= month <= 12):
+            continue
+        lines += [
+            "BEGIN:VEVENT",
+            f"UID:fake-{number}-{month:02d}{day:02d}@text2ics",
+            "DTSTAMP:20260101T000000Z",
+            f"SUMMARY:{line[:60]}",
+        ]
+        if clock := _TIME.search(line):
+            lines += [
+                f"DTSTART;TZID=Europe/Copenhagen:{stamp}T"
+                f"{int(clock['hour']) % 24:02d}{int(clock['minute']) % 60:02d}00",
+                "DURATION:PT1H",
+            ]
+        else:
+            lines.append(f"DTSTART;VALUE=DATE:{stamp}")
+        lines.append("END:VEVENT")
+    lines.append("END:VCALENDAR")
+    return "\r\n".join(lines) + "\r\n"
+
+
+@dataclass
+class FakeProvider(CustomLLM):
+    """A litellm custom provider answering prompts locally, see the module docstring"""
+
+    latency: float = 0.05
+    slow_rate: float = 0.0
+    slow_latency: float = 5.0
+    tokens_per_second: float = 2000.0
+    rate_limit_rate: float = 0.0
+    error_rate: float = 0.0
+    invalid_rate: float = 0.0
+    garbage_rate: float = 0.0
+    seed: int = 0
+    requests: int = field(default=0, init=False)
+
+    def __post_init__(self):
+        super().__init__()
+        self._random = random.Random(self.seed)
+        self._prefixes: set[tuple[str, ...]] = set()
+
+    def _answer(self, messages: list[dict[str, Any]]) -> str:
+        self.requests += 1
+        if self._random.random() < self.rate_limit_rate:
+            raise RateLimitError(
+                "Fake rate limit",
+                llm_provider=PROVIDER,
+                model=FAKE_MODEL,
+                response=httpx.Response(
+                    429,
+                    headers={"retry-after-ms": "50"},
+                    request=httpx.Request("POST", "http://fake"),
+                ),
+            )
+        if self._random.random() < self.error_rate:
+            raise InternalServerError("Fake server error", llm_provider=PROVIDER, model=FAKE_MODEL)
+
+        prompt = messages[-1]["content"]
+        if self._random.random() < self.garbage_rate:
+            return "Sorry, I cannot help with that."
+        answer = render_calendar(prompt)
+        if "<EVENT>" not in prompt and self._random.random() < self.invalid_rate:
+            answer = re.sub(r"DTSTART[^\r\n]*", "DTSTART:notadate", answer, count=1)
+        return answer
+
+    def _latency(self) -> float:
+        return self.slow_latency if self._random.random() < self.slow_rate else self.latency
+
+    def _usage(self, messages: list[dict[str, Any]], answer: str) -> ChatCompletionUsageBlock:
+        prompt_tokens = sum(estimate_tokens(m["content"]) for m in messages)
+        completion_tokens = estimate_tokens(answer)
+        marked = [index for index, m in enumerate(messages) if "cache_control" in m]
+        prefix = tuple(m["content"] for m in messages[: marked[-1] + 1]) if marked else ()
+        cached_tokens = sum(map(estimate_tokens, prefix)) if prefix in self._prefixes else 0
+        self._prefixes.add(prefix)
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "prompt_tokens_details": {"cached_tokens": cached_tokens},
+        }
+
+    async def acompletion(
+        self, model: str, messages: list[dict[str, Any]], *args: Any, **kwargs: Any
+    ) -> ModelResponse:
+        answer = self._answer(messages)
+        await asyncio.sleep(self._latency() + estimate_tokens(answer) / self.tokens_per_second)
+        return ModelResponse(
+            model=model,
+            choices=[{"message": {"role": "assistant", "content": answer}}],
+            usage=self._usage(messages, answer),
+        )
+
+    # litellm declares astreaming as a coroutine, but iterates over what it returns
+    def astreaming(  # pyright: ignore[reportIncompatibleMethodOverride]
+        self, model: str, messages: list[dict[str, Any]], *args: Any, **kwargs: Any
+    ) -> AsyncIterator[GenericStreamingChunk]:
+        # answer eagerly, so rate limits and errors surface before streaming starts
+        answer = self._answer(messages)
+        return self._stream(answer, self._usage(messages, answer), self._latency())
+
+    async def _stream(
+        self, answer: str, usage: ChatCompletionUsageBlock, latency: float
+    ) -> AsyncIterator[GenericStreamingChunk]:
+        await asyncio.sleep(latency)
+        started = time.perf_counter()
+        lines = answer.splitlines(keepends=True)
+        sent = 0
+        for index, line in enumerate(lines):
+            sent += estimate_tokens(line)
+            # pace the output without sleeping for every single line
+            if (ahead := sent / self.tokens_per_second - (time.perf_counter() - started)) > 0.005:
+                await asyncio.sleep(ahead)
+            last = index == len(lines) - 1
+            yield {
+                "text": line,
+                "tool_use": None,
+                "is_finished": last,
+                "finish_reason": "stop" if last else "",
+                "usage": usage if last else None,
+                "index": 0,
+            }
+
+
+def install(provider: FakeProvider | None = None) -> FakeProvider:
+    """Register ``provider`` (or a default one) with litellm and return it"""
+    provider = provider or FakeProvider()
+    litellm.custom_provider_map = [
+        entry for entry in litellm.custom_provider_map if entry["provider"] != PROVIDER
+    ] + [{"provider": PROVIDER, "custom_handler": provider}]
+    litellm.utils.custom_llm_setup()
+    return provider
@@ -0,0 +1,85 @@
+"""
+Startup benchmark and guard against heavy imports on the fast CLI paths.
+
+``--help``, ``--version``, argument validation, cache hits and inputs converted by the
+fast path must not import litellm (seconds on its own) or the other LLM dependencies.
+The doctests below check that in fresh interpreters; run the module to time them:
+
+    python -m benchmarks.imports
+"""
+
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+HEAVY_MODULES = ("litellm", "promptic", "tenacity", "dotenv")
+
+CLI_HELP = "from text2ics.cli import app; app(['--help'])"
+CLI_VERSION = "from text2ics.cli import app; app(['--version'])"
+CLI_INVALID = "from text2ics.cli import app; app(['convert', '/nonexistent'])"
+CACHE_HIT = """
+import tempfile
+from text2ics.cache import ResultCache, cache_key
+from text2ics.converter import process_content
+from text2ics.ics import new_calendar
+cache = ResultCache(tempfile.mkdtemp())
+cache.put(cache_key("Yoga on Monday", "gpt-5"), new_calendar().to_ical())
+process_content("Yoga on Monday", None, "gpt-5", cache=cache)
+"""
+FAST_PATH = (
+    "from text2ics.converter import process_content; process_content('24/9 - Intro', None, 'gpt-5')"
+)
+SCENARIOS = {
+    "help": CLI_HELP,
+    "version": CLI_VERSION,
+    "invalid arguments": CLI_INVALID,
+    "cache hit": CACHE_HIT,
+    "fast path": FAST_PATH,
+}
+
+
+def _run(code: str) -> list[str]:
+    """Run ``code`` in a fresh interpreter and return the modules it ended up importing"""
+    report = "\nimport json, sys; print(json.dumps(sorted(sys.modules)))"
+    script = f"try:\n    exec({code!r})\nexcept SystemExit:\n    pass{report}"
+    output = subprocess.run(
+        [sys.executable, "-c", script], capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def heavy_imports(code: str) -> list[str]:
+    """
+    List the heavy top-level modules imported by running ``code``.
+
+    >>> heavy_imports(CLI_HELP)
+    []
+    >>> heavy_imports(CLI_VERSION)
+    []
+    >>> heavy_imports(CLI_INVALID)
+    []
+    >>> heavy_imports(CACHE_HIT)
+    []
+    >>> heavy_imports(FAST_PATH)
+    []
+    """
+    return [module for module in _run(code) if module in HEAVY_MODULES]
+
+
+def startup_time(code: str, repeat: int = 5) -> float:
+    """Median wall time of running ``code`` in a fresh interpreter"""
+    times: list[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], capture_output=True, check=False)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+if __name__ == "__main__":
+    baseline = startup_time("pass")
+    print(f"{'interpreter':<20}{baseline:8.3f}s")
+    for name, code in {**SCENARIOS, "import litellm": "import litellm"}.items():
+        print(f"{name:<20}{startup_time(code) - baseline:8.3f}s")
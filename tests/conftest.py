@@ -0,0 +1,21 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# keep litellm from fetching its model cost map over the network on import
+os.environ.setdefault("LITELLM_LOCAL_MODEL_COST_MAP", "True")
+# the app modules import each other by name, as streamlit runs them from app/
+sys.path.insert(0, str(Path(__file__).parents[1] / "app"))
+
+
+@pytest.fixture
+def fake_provider():
+    """Install a fake LLM provider, by default answering right away"""
+    from benchmarks.fake_provider import FakeProvider, install
+
+    def install_provider(provider: FakeProvider | None = None) -> FakeProvider:
+        return install(provider or FakeProvider(latency=0.01))
+
+    return install_provider
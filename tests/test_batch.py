@@ -0,0 +1,108 @@
+import asyncio
+from collections.abc import Callable, Iterator
+from pathlib import Path
+
+import pytest
+from icalendar import Calendar
+from typer.testing import CliRunner
+
+from benchmarks.fake_provider import FAKE_MODEL, FakeProvider
+from text2ics.batch import BatchResult, convert_files, expand_inputs, map_bounded
+from text2ics.cli import app
+
+
+def write(path: Path, text: str = "") -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+    return path
+
+
+def test_inputs_expand_in_order_without_duplicates(tmp_path: Path):
+    b, a = write(tmp_path / "hold" / "b.txt"), write(tmp_path / "hold" / "a.txt")
+    write(tmp_path / "hold" / "notes.md")
+    c = write(tmp_path / "c.txt")
+
+    paths = expand_inputs([str(c), str(tmp_path / "hold"), str(tmp_path / "**" / "*.txt")])
+
+    assert paths == [c, a, b]
+
+
+def test_inputs_that_match_nothing_are_an_error(tmp_path: Path):
+    with pytest.raises(FileNotFoundError, match="missing"):
+        expand_inputs([str(tmp_path / "missing" / "*.txt")])
+
+
+def test_map_bounded_limits_the_calls_in_flight():
+    in_flight, most, pulled = 0, 0, 0
+
+    def items() -> Iterator[int]:
+        nonlocal pulled
+        for item in range(10):
+            pulled += 1
+            yield item
+
+    async def double(item: int) -> int:
+        nonlocal in_flight, most
+        in_flight += 1
+        most = max(most, in_flight)
+        await asyncio.sleep(0.01 * (item % 3))
+        in_flight -= 1
+        return item * 2
+
+    async def first_results() -> tuple[list[int], int]:
+        results: list[int] = []
+        pulled_early = 0
+        async for result in map_bounded(double, items(), concurrency=3):
+            results.append(result)
+            if len(results) == 1:
+                pulled_early = pulled
+        return results, pulled_early
+
+    results, pulled_early = asyncio.run(first_results())
+
+    assert sorted(results) == [item * 2 for item in range(10)]
+    assert most == 3
+    # items are pulled as calls finish, not all up front
+    assert pulled_early < 10
+
+
+def test_map_bounded_needs_a_positive_concurrency():
+    async def run() -> None:
+        async for _ in map_bounded(asyncio.sleep, [0], concurrency=0):
+            pass
+
+    with pytest.raises(ValueError):
+        asyncio.run(run())
+
+
+def test_failed_files_are_reported_without_stopping_the_batch(
+    fake_provider: Callable[..., FakeProvider], tmp_path: Path
+):
+    fake_provider()
+    good = write(tmp_path / "good.txt", "Yoga mandag 5/10\nPilates tirsdag 6/10\n")
+    missing = tmp_path / "missing.txt"
+
+    async def run() -> list[BatchResult]:
+        files = convert_files([good, missing], "fake-key", FAKE_MODEL, fast_path=False)
+        return [result async for result in files]
+
+    results = {result.source: result for result in asyncio.run(run())}
+
+    assert (results[good].ok, results[good].event_count, results[good].error) == (True, 2, None)
+    assert not results[missing].ok
+    assert "missing.txt" in (results[missing].error or "")
+
+
+def test_merged_calendar_is_written_to_stdout_as_is(tmp_path: Path):
+    write(tmp_path / "a.txt", "24/9 - Intro [b]Aflyst[/b] kl. 19-21\n")
+    write(tmp_path / "b.txt", "25/9 - Oprydning\n")
+
+    result = CliRunner().invoke(
+        app, ["batch", str(tmp_path), "--merge", "-", "--no-cache", "--api-key", "fake-key"]
+    )
+
+    assert result.exit_code == 0
+    calendar = Calendar.from_ical(result.stdout_bytes.decode("utf-8"))
+    summaries = sorted(str(event["SUMMARY"]) for event in calendar.walk("VEVENT"))
+    assert summaries == ["Intro [b]Aflyst[/b]", "Oprydning"]
+    assert result.stdout_bytes.endswith(b"END:VCALENDAR\r\n")
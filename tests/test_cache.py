@@ -0,0 +1,73 @@
+from pathlib import Path
+
+import pytest
+
+from text2ics import cache as cache_module
+from text2ics.cache import ResultCache
+
+
+class Clock:
+    """A stand-in for ``time.time`` that only moves when told to"""
+
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(cache_module.time, "time", clock)
+    return clock
+
+
+def test_least_recently_used_entries_are_evicted_first(tmp_path: Path, clock: Clock):
+    cache = ResultCache(tmp_path, max_bytes=30, max_age=None)
+    for key in "abc":
+        cache.put(key, key.encode() * 10)
+        clock.now += 1
+    cache.get("a")
+    clock.now += 1
+
+    cache.put("d", b"d" * 10)
+
+    assert [key for key in "abcd" if cache.get(key) is not None] == ["a", "c", "d"]
+    assert (cache.size, cache.stats.evictions) == (30, 1)
+
+
+def test_entries_larger_than_the_cache_are_not_kept(tmp_path: Path, clock: Clock):
+    cache = ResultCache(tmp_path, max_bytes=10, max_age=None)
+    cache.put("small", b"x" * 5)
+
+    cache.put("large", b"x" * 11)
+
+    assert len(cache) == 0
+
+
+def test_expired_entries_are_misses_and_evicted(tmp_path: Path, clock: Clock):
+    cache = ResultCache(tmp_path, max_age=60)
+    cache.put("old", b"ics")
+    clock.now += 30
+    cache.put("new", b"ics")
+    clock.now += 31
+
+    assert cache.get("old") is None
+    assert cache.get("new") == b"ics"
+    assert (cache.stats.hits, cache.stats.misses) == (1, 1)
+
+    cache.put("newer", b"ics")
+
+    assert len(cache) == 2
+    assert cache.stats.evictions == 1
+
+
+def test_reading_an_entry_does_not_extend_its_age(tmp_path: Path, clock: Clock):
+    cache = ResultCache(tmp_path, max_age=60)
+    cache.put("key", b"ics")
+    clock.now += 50
+    assert cache.get("key") == b"ics"
+    clock.now += 20
+
+    assert cache.get("key") is None
@@ -0,0 +1,50 @@
+from collections.abc import Callable
+from typing import Any
+
+import pytest
+from icalendar import Component
+
+from benchmarks.fake_provider import FAKE_MODEL, HEDGE_MODEL, FakeProvider
+from text2ics.converter import process_content
+
+TEXT = "Kære medlem\nVi ses til [/b] Yoga [Aflyst] mandag d. 5/10 kl. 12.00\nHusk måtte\n"
+
+
+class ImplausibleFirstAnswer(FakeProvider):
+    """Dates its first calendar decades back, then answers like a well-behaved model"""
+
+    def _answer(self, messages: list[dict[str, Any]]) -> str:
+        answer = super()._answer(messages)
+        return answer.replace(":2026", ":1990") if self.requests == 1 else answer
+
+
+def test_cascade_escalates_an_implausible_calendar(
+    fake_provider: Callable[..., FakeProvider], capsys: pytest.CaptureFixture[str]
+):
+    provider = fake_provider(ImplausibleFirstAnswer(latency=0.01))
+    events: list[Component] = []
+
+    result = process_content(
+        TEXT, "fake-key", FAKE_MODEL, fast_path=False, on_event=events.append, cascade=[HEDGE_MODEL]
+    )
+
+    assert provider.requests == 2
+    [escalation] = result.profile.escalations
+    assert escalation["model"] == HEDGE_MODEL
+    # summaries are reported as they are, never read as markup
+    assert "[/b] Yoga [Aflyst]" in escalation["reason"]
+    assert capsys.readouterr().out == ""
+    # the events of the rejected calendar are never reported
+    assert [event.decoded("DTSTART").year for event in events] == [2026]
+
+
+def test_cascade_keeps_a_plausible_calendar(fake_provider: Callable[..., FakeProvider]):
+    provider = fake_provider()
+
+    result = process_content(
+        TEXT + "2", "fake-key", FAKE_MODEL, fast_path=False, cascade=[HEDGE_MODEL]
+    )
+
+    assert provider.requests == 1
+    assert result.profile.escalations == []
+    assert result.event_count == 1
@@ -0,0 +1,75 @@
+import functools
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+from icalendar import Component
+
+from benchmarks.fake_provider import FAKE_MODEL, HEDGE_MODEL, FakeProvider
+from text2ics.cache import ResultCache
+from text2ics.converter import process_content
+
+TEXT = "Kære medlem\nVi ses til Yoga mandag d. 5/10 kl. 12.00\nHusk måtte\n"
+
+
+class SlowFirstAnswer(FakeProvider):
+    """Takes seconds to answer the first request, then answers right away"""
+
+    def _latency(self) -> float:
+        return 3.0 if self.requests == 1 else 0.01
+
+
+def test_hedge_wins_when_the_primary_is_slow(fake_provider: Callable[..., FakeProvider]):
+    provider = fake_provider(SlowFirstAnswer())
+    events: list[Component] = []
+
+    start = time.perf_counter()
+    result = process_content(
+        TEXT,
+        "fake-key",
+        FAKE_MODEL,
+        fast_path=False,
+        on_event=events.append,
+        hedge_model=HEDGE_MODEL,
+        hedge_delay=0.2,
+    )
+
+    assert time.perf_counter() - start < 2.0
+    assert result.profile.hedges == {"hedge": 1}
+    assert provider.requests == 2
+    # only the winner's events are reported
+    assert len(events) == result.event_count == 1
+
+
+def test_no_hedge_when_the_primary_answers_in_time(fake_provider: Callable[..., FakeProvider]):
+    provider = fake_provider()
+
+    result = process_content(
+        TEXT + "2",
+        "fake-key",
+        FAKE_MODEL,
+        fast_path=False,
+        on_event=lambda event: None,
+        hedge_model=HEDGE_MODEL,
+        hedge_delay=1.0,
+    )
+
+    assert result.profile.hedges == {}
+    assert provider.requests == 1
+
+
+def test_hedged_results_are_cached_apart(
+    fake_provider: Callable[..., FakeProvider], tmp_path: Path
+):
+    provider = fake_provider(SlowFirstAnswer())
+    cache = ResultCache(tmp_path)
+    convert = functools.partial(
+        process_content, TEXT + "3", "fake-key", FAKE_MODEL, cache=cache, fast_path=False
+    )
+
+    hedged = convert(hedge_model=HEDGE_MODEL, hedge_delay=0.2)
+    assert hedged.profile.hedges == {"hedge": 1}
+    # the hedge's calendar is not served as the answer of the primary model
+    assert convert().profile.cache == "miss"
+    assert convert(hedge_model=HEDGE_MODEL, hedge_delay=0.2).profile.cache == "hit"
+    assert provider.requests == 3
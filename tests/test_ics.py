@@ -0,0 +1,68 @@
+from icalendar import Calendar, Component
+
+from text2ics.ics import merge_calendars
+
+
+def calendar(*events: tuple[str, str, str], timezone: bool = False) -> Component:
+    """A calendar of ``(uid, summary, start)`` events"""
+    lines = ["BEGIN:VCALENDAR", "VERSION:2.0", "PRODID:-//text2ics//test//EN"]
+    if timezone:
+        lines += [
+            "BEGIN:VTIMEZONE",
+            "TZID:Europe/Copenhagen",
+            "BEGIN:STANDARD",
+            "DTSTART:19701025T030000",
+            "TZOFFSETFROM:+0200",
+            "TZOFFSETTO:+0100",
+            "END:STANDARD",
+            "END:VTIMEZONE",
+        ]
+    for uid, summary, start in events:
+        lines += [
+            "BEGIN:VEVENT",
+            f"UID:{uid}",
+            "DTSTAMP:20260101T000000Z",
+            f"SUMMARY:{summary}",
+            f"DTSTART;TZID=Europe/Copenhagen:{start}",
+            "END:VEVENT",
+        ]
+    lines.append("END:VCALENDAR")
+    return Calendar.from_ical("\r\n".join(lines) + "\r\n")
+
+
+def events(merged: Component) -> list[tuple[str, str]]:
+    return [(str(event["UID"]), str(event["SUMMARY"])) for event in merged.walk("VEVENT")]
+
+
+def test_repeated_events_are_merged_once():
+    first = calendar(("1@a", "Yoga", "20261005T120000"), timezone=True)
+    second = calendar(
+        ("1@b", "  yoga ", "20261005T120000"),
+        ("2@b", "Yoga", "20261012T120000"),
+        timezone=True,
+    )
+
+    merged = merge_calendars([first, second], deduplicate=True)
+
+    assert events(merged) == [("1@a", "Yoga"), ("2@b", "Yoga")]
+    assert len(merged.walk("VTIMEZONE")) == 1
+
+
+def test_reused_uids_are_replaced():
+    first = calendar(("1@fake", "Yoga", "20261005T120000"))
+    second = calendar(("1@fake", "Pilates", "20261006T120000"))
+
+    merged = merge_calendars([first, second], deduplicate=True)
+
+    [(yoga_uid, _), (pilates_uid, summary)] = events(merged)
+    assert (yoga_uid, summary) == ("1@fake", "Pilates")
+    assert pilates_uid not in ("1@fake", "")
+
+
+def test_events_are_kept_as_they_are_without_deduplication():
+    first = calendar(("1@a", "Yoga", "20261005T120000"))
+    second = calendar(("1@a", "Yoga", "20261005T120000"))
+
+    merged = merge_calendars([first, second])
+
+    assert events(merged) == [("1@a", "Yoga"), ("1@a", "Yoga")]
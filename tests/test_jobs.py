@@ -0,0 +1,67 @@
+import asyncio
+import time
+from typing import Any
+
+from jobs import ConversionJob, JobQueue
+from litellm.exceptions import RateLimitError
+
+
+def wait_for(jobs: list[ConversionJob], timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not all(job.done for job in jobs):
+        assert time.monotonic() < deadline, [job.stage for job in jobs]
+        time.sleep(0.01)
+
+
+def test_sessions_take_turns():
+    started: list[str] = []
+
+    async def convert(content: str, **kwargs: Any) -> str:
+        started.append(content)
+        await asyncio.sleep(0.02)
+        return content
+
+    queue = JobQueue(convert, workers=1)
+    jobs = [
+        queue.submit(session, ConversionJob(content, "key", "gpt-5", None))
+        for session, content in [("a", "a1"), ("a", "a2"), ("a", "a3"), ("b", "b1"), ("b", "b2")]
+    ]
+    assert queue.position(jobs[3]) == 1  # a2, then b1 before the rest of a
+
+    wait_for(jobs)
+    assert started == ["a1", "a2", "b1", "a3", "b2"]
+    assert all(job.stage == "done" for job in jobs)
+
+
+def test_requeues_after_a_rate_limit():
+    calls = 0
+
+    async def convert(content: str, **kwargs: Any) -> str:
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            raise RateLimitError("Too many requests", llm_provider="openai", model="gpt-5")
+        await asyncio.sleep(0.05)
+        return content
+
+    queue = JobQueue(convert, workers=1)
+    job = queue.submit("a", ConversionJob("text", "key", "gpt-5", None))
+    first_start = job.started
+
+    wait_for([job])
+    assert (job.stage, job.result, job.requeued, calls) == ("done", "text", 1, 2)
+    # the second run is timed on its own
+    assert job.started > first_start
+    assert 0.05 <= job.elapsed < 1.0
+
+
+def test_gives_up_after_max_requeues():
+    async def convert(content: str, **kwargs: Any) -> str:
+        raise RateLimitError("Too many requests", llm_provider="openai", model="gpt-5")
+
+    queue = JobQueue(convert, workers=1, max_requeues=2)
+    job = queue.submit("a", ConversionJob("text", "key", "gpt-5", None))
+
+    wait_for([job])
+    assert (job.stage, job.requeued) == ("failed", 2)
+    assert isinstance(job.error, RateLimitError)
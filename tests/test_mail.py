@@ -0,0 +1,120 @@
+import asyncio
+import json
+import mailbox
+from collections.abc import Callable
+from datetime import date
+from email.message import EmailMessage
+from pathlib import Path
+from typing import Any
+
+from typer.testing import CliRunner
+
+from benchmarks.fake_provider import FAKE_MODEL, FakeProvider
+from text2ics.cache import ResultCache
+from text2ics.cli import app
+from text2ics.mail import MailMessage, MessageResult, convert_messages
+
+SENT = "Tue, 01 Sep 2025 09:00:00 +0200"
+
+
+class RecordingProvider(FakeProvider):
+    """Answers right away, keeps the prompts it was sent and fails while told to"""
+
+    def __init__(self, fail: str | None = None):
+        super().__init__(latency=0.01)
+        self.prompts: list[str] = []
+        self.fail = fail
+
+    def _answer(self, messages: list[dict[str, Any]]) -> str:
+        prompt = messages[-1]["content"]
+        self.prompts.append(prompt)
+        if self.fail and self.fail in prompt:
+            raise ValueError("the provider is down")
+        return super()._answer(messages)
+
+
+def convert(messages: list[MailMessage], **kwargs: Any) -> list[MessageResult]:
+    async def collect() -> list[MessageResult]:
+        return [result async for result in convert_messages(messages, "fake-key", **kwargs)]
+
+    return asyncio.run(collect())
+
+
+def test_dates_are_resolved_as_of_the_day_the_message_was_sent():
+    message = MailMessage("1", "Hold", SENT, "24/9 - Intro kl. 19-21")
+
+    [result] = convert([message], model=FAKE_MODEL)
+
+    assert result.calendar is not None
+    [event] = result.calendar.walk("VEVENT")
+    assert event.decoded("DTSTART").date() == date(2025, 9, 24)
+
+
+def test_the_send_date_reaches_the_prompt_and_the_cache_key(
+    fake_provider: Callable[..., FakeProvider], tmp_path: Path
+):
+    provider = RecordingProvider()
+    fake_provider(provider)
+    cache = ResultCache(tmp_path)
+    body = "Vi ses til yoga mandag d. 5/10 kl. 12.00"
+    later = "Mon, 01 Sep 2026 09:00:00 +0200"
+    messages = [MailMessage("1", "", SENT, body), MailMessage("2", "", later, body)]
+
+    convert(messages, model=FAKE_MODEL, cache=cache, fast_path=False, concurrency=1)
+    convert(messages[:1], model=FAKE_MODEL, cache=cache, fast_path=False)
+
+    assert len(provider.prompts) == 2
+    assert [prompt.count("REFERENCE_DATE: ") for prompt in provider.prompts] == [1, 1]
+    assert {"2025-09-01", "2026-09-01"} == {
+        prompt.split("REFERENCE_DATE: ")[1][:10] for prompt in provider.prompts
+    }
+
+
+def test_messages_without_dates_are_skipped(fake_provider: Callable[..., FakeProvider]):
+    provider = fake_provider()
+    messages = [MailMessage("1", "Nyhedsbrev", SENT, "Intet nyt i denne uge")]
+
+    [result] = convert(messages, model=FAKE_MODEL)
+
+    assert result.status == "skipped"
+    assert provider.requests == 0
+
+
+def write_mbox(path: Path, bodies: list[str]) -> None:
+    box = mailbox.mbox(path)
+    for number, body in enumerate(bodies):
+        message = EmailMessage()
+        message["Subject"] = f"Besked {number}"
+        message["Date"] = SENT
+        message["Message-ID"] = f"<{number}@example.com>"
+        message.set_content(body)
+        box.add(message)
+    box.flush()
+    box.close()
+
+
+def test_ingest_resumes_with_the_unfinished_messages(
+    fake_provider: Callable[..., FakeProvider], tmp_path: Path
+):
+    provider = RecordingProvider(fail="Spinning")
+    fake_provider(provider)
+    path = tmp_path / "inbox.mbox"
+    write_mbox(path, ["Yoga mandag 5/10", "Intet nyt", "Spinning onsdag 7/10"])
+    output = tmp_path / "out"
+    arguments = ["ingest", str(path), "--output-dir", str(output), "--model", FAKE_MODEL]
+    arguments += ["--api-key", "fake-key", "--no-cache", "--no-fast-path", "--max-attempts", "1"]
+    runner = CliRunner()
+
+    first = runner.invoke(app, arguments)
+
+    assert first.exit_code == 1
+    journal = [json.loads(line) for line in (output / "journal.jsonl").read_text().splitlines()]
+    assert sorted(entry["status"] for entry in journal) == ["failed", "ok", "skipped"]
+
+    provider.fail, provider.prompts = None, []
+    second = runner.invoke(app, arguments)
+
+    assert second.exit_code == 0
+    [prompt] = provider.prompts
+    assert "Spinning" in prompt
+    assert len(list(output.glob("*.ics"))) == 2
@@ -0,0 +1,59 @@
+import asyncio
+
+import httpx
+from litellm.exceptions import RateLimitError
+
+from text2ics.ratelimit import AdaptiveRateLimiter
+
+
+def rate_limit_error(retry_after_ms: str = "500") -> RateLimitError:
+    return RateLimitError(
+        "Too many requests",
+        llm_provider="openai",
+        model="gpt-5",
+        response=httpx.Response(
+            429,
+            headers={"retry-after-ms": retry_after_ms},
+            request=httpx.Request("POST", "https://api.openai.com"),
+        ),
+    )
+
+
+def test_rate_limit_halves_rate_and_concurrency_and_pauses():
+    limiter = AdaptiveRateLimiter(rate=8.0, concurrency=8)
+    asyncio.run(limiter.acquire())
+    limiter.release(rate_limit_error())
+
+    stats = limiter.stats
+    assert (stats.rate, stats.concurrency_limit, stats.rate_limited) == (4.0, 4, 1)
+    assert 0.4 < stats.paused_for <= 0.5
+
+
+def test_success_grows_rate_and_concurrency_additively():
+    limiter = AdaptiveRateLimiter(rate=4.0, concurrency=4)
+    for _ in range(4):
+        asyncio.run(limiter.acquire())
+        limiter.release()
+
+    assert limiter.concurrency_limit == 4  # +1/window per success: ~4.9 after four
+    assert 4.9 < limiter.rate < 5.0
+    asyncio.run(limiter.acquire())
+    limiter.release()
+    assert limiter.concurrency_limit == 5
+
+
+def test_waits_for_a_free_slot():
+    limiter = AdaptiveRateLimiter(rate=100.0, concurrency=1, max_concurrency=1)
+    order: list[str] = []
+
+    async def request(name: str) -> None:
+        async with limiter.slot():
+            order.append(f"{name} start")
+            await asyncio.sleep(0.05)
+            order.append(f"{name} end")
+
+    async def main() -> None:
+        await asyncio.gather(request("a"), request("b"))
+
+    asyncio.run(main())
+    assert order == ["a start", "a end", "b start", "b end"]
@@ -0,0 +1,46 @@
+from collections.abc import Callable
+from datetime import date
+from typing import Any
+
+from benchmarks.fake_provider import FAKE_MODEL, FakeProvider
+from text2ics.converter import process_content
+from text2ics.rules import parse_schedule
+
+AGENDA = "Program lørdag 24/9\n12.05 - Frokost\n13.10 - Workshop\n11.11 - Pause\n"
+
+
+class RecordingProvider(FakeProvider):
+    """Answers right away and keeps the last prompt it was sent"""
+
+    prompt = ""
+
+    def _answer(self, messages: list[dict[str, Any]]) -> str:
+        self.prompt = messages[-1]["content"]
+        return super()._answer(messages)
+
+
+def test_agenda_times_are_not_read_as_dates():
+    parsed = parse_schedule(AGENDA, today=date(2026, 9, 1))
+
+    assert parsed.events == []
+    assert parsed.unparsed == AGENDA.splitlines()
+    assert parsed.needs_llm
+
+
+def test_agenda_reaches_the_llm_with_its_heading(fake_provider: Callable[..., FakeProvider]):
+    provider = RecordingProvider(latency=0.01)
+    fake_provider(provider)
+
+    process_content(AGENDA, "fake-key", FAKE_MODEL)
+
+    assert provider.requests == 1
+    assert "Program lørdag 24/9" in provider.prompt
+    assert "12.05 - Frokost" in provider.prompt
+
+
+def test_timed_events_come_with_their_time_zone():
+    calendar = parse_schedule("24/9 - Intro kl. 19-21\n25/9 - Oprydning").calendar()
+
+    assert [timezone.tz_name for timezone in calendar.timezones] == ["Europe/Copenhagen"]
+    assert calendar.get_missing_tzids() == set()
+    assert b"BEGIN:VTIMEZONE" in calendar.to_ical()
@@ -0,0 +1,52 @@
+import re
+from collections.abc import Callable
+from typing import Any
+
+from benchmarks.fake_provider import FAKE_MODEL, FakeProvider
+from text2ics.converter import process_content
+
+TEXT = "Holdstart\nYoga mandag 5/10\nPilates tirsdag 6/10\nSpinning onsdag 7/10\n"
+_EVENT = re.compile(r"<EVENT>\s*(.*?)\s*</EVENT>", re.DOTALL)
+
+
+class PartialFixes(FakeProvider):
+    """Breaks every event but the first, then fixes only one broken event per request"""
+
+    def __init__(self):
+        super().__init__(latency=0.01)
+        self.fix_prompts: list[str] = []
+
+    def _answer(self, messages: list[dict[str, Any]]) -> str:
+        answer = super()._answer(messages)
+        prompt = messages[-1]["content"]
+        if "<EVENT>" not in prompt:
+            first, *rest = answer.split("END:VEVENT")
+            broken = [re.sub(r"DTSTART[^\r\n]*", "DTSTART:notadate", part) for part in rest]
+            return "END:VEVENT".join([first, *broken])
+        self.fix_prompts.append(prompt)
+        block = re.sub(r"DTSTART[^\n]*\n", "", _EVENT.findall(prompt)[0])
+        block = block.replace("END:VEVENT", "DTSTART;VALUE=DATE:20261006\nEND:VEVENT")
+        return f"BEGIN:VCALENDAR\r\nVERSION:2.0\r\n{block}\r\nEND:VCALENDAR\r\n"
+
+
+def test_unreturned_fixes_are_dropped(fake_provider: Callable[..., FakeProvider]):
+    provider = PartialFixes()
+    fake_provider(provider)
+
+    result = process_content(TEXT, "fake-key", FAKE_MODEL, fast_path=False, max_attempts=2)
+
+    assert provider.requests == 2
+    assert result.event_count == 2
+    assert (result.profile.events_fixed, result.profile.events_dropped) == (1, 1)
+
+
+def test_unreturned_fixes_are_requested_again(fake_provider: Callable[..., FakeProvider]):
+    provider = PartialFixes()
+    fake_provider(provider)
+
+    result = process_content(TEXT + "\n", "fake-key", FAKE_MODEL, fast_path=False, max_attempts=3)
+
+    assert [prompt.count("<EVENT>") for prompt in provider.fix_prompts] == [2, 1]
+    assert "Spinning" in _EVENT.findall(provider.fix_prompts[1])[0]
+    assert result.event_count == 3
+    assert (result.profile.events_fixed, result.profile.events_dropped) == (2, 0)
@@ -0,0 +1,136 @@
+import asyncio
+import json
+from collections.abc import AsyncGenerator, Callable
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any
+
+from benchmarks.fake_provider import FAKE_MODEL, FakeProvider
+from text2ics.server import ConversionServer
+
+Reply = tuple[int, dict[str, str], bytes]
+
+
+@asynccontextmanager
+async def running(socket: Path, **options: Any) -> AsyncGenerator[ConversionServer]:
+    server = ConversionServer("fake-key", FAKE_MODEL, fast_path=False, **options)
+    task = asyncio.create_task(server.serve(socket=str(socket)))
+    while not socket.exists():
+        await asyncio.sleep(0.01)
+    try:
+        yield server
+    finally:
+        task.cancel()
+
+
+async def read_reply(reader: asyncio.StreamReader) -> Reply:
+    status = int((await reader.readline()).split()[1])
+    headers: dict[str, str] = {}
+    while (line := await reader.readline()) != b"\r\n":
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    return status, headers, await reader.readexactly(int(headers["content-length"]))
+
+
+def request(method: str, target: str, body: bytes = b"", **headers: str) -> bytes:
+    lines = [f"{method} {target} HTTP/1.1", f"Content-Length: {len(body)}"]
+    lines += [f"{name.replace('_', '-')}: {value}" for name, value in headers.items()]
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body
+
+
+async def exchange(socket: Path, *requests: bytes) -> list[Reply]:
+    """Send ``requests`` one after the other on a single connection"""
+    reader, writer = await asyncio.open_unix_connection(str(socket))
+    try:
+        replies: list[Reply] = []
+        for raw in requests:
+            writer.write(raw)
+            replies.append(await read_reply(reader))
+        return replies
+    finally:
+        writer.close()
+
+
+def test_requests_share_a_connection(fake_provider: Callable[..., FakeProvider], tmp_path: Path):
+    fake_provider()
+    socket = tmp_path / "server.sock"
+
+    async def scenario() -> list[Reply]:
+        async with running(socket):
+            return await exchange(
+                socket,
+                request("GET", "/health"),
+                request("POST", "/convert", "Yoga 5/10 kl. 12.00".encode()),
+                request(
+                    "POST",
+                    "/convert",
+                    b'{"text": "Pilates 6/10"}',
+                    Content_Type="application/json",
+                    Accept="application/json",
+                ),
+            )
+
+    health, ics, answer = asyncio.run(scenario())
+
+    assert (health[0], health[1]["connection"], json.loads(health[2])) == (
+        200,
+        "keep-alive",
+        {"status": "ok"},
+    )
+    assert ics[1]["content-type"] == "text/calendar; charset=utf-8"
+    assert b"SUMMARY:Yoga 5/10 kl. 12.00" in ics[2]
+    data = json.loads(answer[2])
+    assert data["events"] == 1
+    assert "SUMMARY:Pilates 6/10" in data["ics"]
+    assert "profile" in data
+
+
+def test_requests_beyond_the_queue_are_rejected(
+    fake_provider: Callable[..., FakeProvider], tmp_path: Path
+):
+    fake_provider(FakeProvider(latency=0.3))
+    socket = tmp_path / "server.sock"
+
+    async def scenario() -> tuple[list[Reply], dict[str, Any]]:
+        async with running(socket, concurrency=1, queue_size=1) as server:
+            replies = await asyncio.gather(
+                *(
+                    exchange(socket, request("POST", "/convert", f"Hold {day}/10".encode()))
+                    for day in range(1, 4)
+                )
+            )
+            return [reply for [reply] in replies], server.metrics()
+
+    replies, metrics = asyncio.run(scenario())
+
+    assert sorted(status for status, _, _ in replies) == [200, 200, 503]
+    [(_, headers, _)] = [reply for reply in replies if reply[0] == 503]
+    assert headers["retry-after"] == "1"
+    assert (metrics["completed"], metrics["rejected"], metrics["failed"]) == (2, 1, 0)
+
+
+def test_bad_requests_are_answered_and_counted_apart(
+    fake_provider: Callable[..., FakeProvider], tmp_path: Path
+):
+    provider = fake_provider()
+    socket = tmp_path / "server.sock"
+
+    async def scenario() -> tuple[list[Reply], Reply, dict[str, Any]]:
+        async with running(socket, max_body=100) as server:
+            replies = await exchange(
+                socket,
+                request("POST", "/convert", b"{not json", Content_Type="application/json"),
+                request("POST", "/convert", b'{"text": 42}', Content_Type="application/json"),
+                request("GET", "/convert"),
+                request("GET", "/nowhere"),
+            )
+            too_large = await exchange(socket, request("POST", "/convert", b"x" * 101))
+            return replies, too_large[0], server.metrics()
+
+    replies, too_large, metrics = asyncio.run(scenario())
+
+    assert [status for status, _, _ in replies] == [400, 400, 405, 404]
+    assert replies[2][1]["allow"] == "POST"
+    assert (too_large[0], too_large[1]["connection"]) == (413, "close")
+    assert (metrics["bad_requests"], metrics["failed"], metrics["completed"]) == (2, 0, 0)
+    assert provider.requests == 0
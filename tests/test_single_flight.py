@@ -0,0 +1,82 @@
+import asyncio
+from collections.abc import Callable
+from typing import Any
+
+from litellm.exceptions import AuthenticationError
+
+from benchmarks.fake_provider import FAKE_MODEL, HEDGE_MODEL, FakeProvider
+from text2ics.converter import InvalidCalendarError, aprocess_content
+from text2ics.result import ConversionResult
+
+TEXT = "Kære medlem\nVi ses til Yoga mandag d. 5/10 kl. 12.00\nHusk Julefrokost 4/12\n"
+
+
+async def convert_concurrently(text: str, callers: int) -> list[Any]:
+    return await asyncio.gather(
+        *(aprocess_content(text, "fake-key", FAKE_MODEL, fast_path=False) for _ in range(callers)),
+        return_exceptions=True,
+    )
+
+
+def test_identical_concurrent_conversions_share_one_llm_call(
+    fake_provider: Callable[..., FakeProvider],
+):
+    provider = fake_provider(FakeProvider(latency=0.2))
+
+    results = asyncio.run(convert_concurrently(TEXT, callers=5))
+
+    assert provider.requests == 1
+    assert sorted(result.profile.cache for result in results) == ["coalesced"] * 4 + ["disabled"]
+    assert [result.event_count for result in results] == [2] * 5
+    # every caller gets a calendar of its own
+    assert len({id(result.calendar) for result in results}) == 5
+    # once the run is over, the next conversion makes its own call
+    later = asyncio.run(aprocess_content(TEXT, "fake-key", FAKE_MODEL, fast_path=False))
+    assert later.profile.cache == "disabled"
+    assert provider.requests == 2
+
+
+def test_invalid_calendar_failure_is_shared(fake_provider: Callable[..., FakeProvider]):
+    provider = fake_provider(FakeProvider(latency=0.05, garbage_rate=1.0))
+
+    results = asyncio.run(convert_concurrently(TEXT + "Igen", callers=4))
+
+    assert all(isinstance(result, InvalidCalendarError) for result in results)
+    assert provider.requests == 3  # the attempts of a single run
+
+
+def test_followers_retry_after_a_transient_failure(fake_provider: Callable[..., FakeProvider]):
+    class FailsFirst(FakeProvider):
+        def _answer(self, messages: list[dict[str, Any]]) -> str:
+            if self.requests == 0:
+                self.requests += 1
+                raise AuthenticationError("Bad key", llm_provider="text2ics-fake", model=FAKE_MODEL)
+            return super()._answer(messages)
+
+    provider = fake_provider(FailsFirst(latency=0.2))
+
+    results = asyncio.run(convert_concurrently(TEXT + "Tredje", callers=3))
+
+    assert isinstance(results[0], AuthenticationError)
+    assert [result.profile.cache for result in results[1:]] == ["disabled", "coalesced"]
+    assert provider.requests == 2
+
+
+def test_conversions_with_other_keys_or_hedges_run_apart(
+    fake_provider: Callable[..., FakeProvider],
+):
+    provider = fake_provider(FakeProvider(latency=0.2))
+
+    async def convert_with_several_settings() -> tuple[ConversionResult, ...]:
+        return await asyncio.gather(
+            aprocess_content(TEXT + "Fjerde", "key-a", FAKE_MODEL, fast_path=False),
+            aprocess_content(TEXT + "Fjerde", "key-b", FAKE_MODEL, fast_path=False),
+            aprocess_content(
+                TEXT + "Fjerde", "key-a", FAKE_MODEL, fast_path=False, hedge_model=HEDGE_MODEL
+            ),
+        )
+
+    results = asyncio.run(convert_with_several_settings())
+
+    assert [result.profile.cache for result in results] == ["disabled"] * 3
+    assert provider.requests == 3
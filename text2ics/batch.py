@@ -0,0 +1,152 @@
+"""
+Concurrent conversion of many inputs within a single process.
+"""
+
+import asyncio
+import glob
+import itertools
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterable, Sequence
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, TypeVar
+
+from text2ics.cache import ResultCache
+from text2ics.relevance import filter_relevant
+
+if TYPE_CHECKING:
+    from icalendar import Component
+
+    from text2ics.metrics import ConversionProfile
+    from text2ics.ratelimit import AdaptiveRateLimiter
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+@dataclass
+class BatchResult:
+    """Outcome of converting a single input"""
+
+    source: Path
+    calendar: "Component | None" = None
+    error: str | None = None
+    elapsed: float = 0.0
+    output: Path | None = None
+    tokens_saved: int = 0
+    profile: "ConversionProfile | None" = None
+
+    @property
+    def ok(self) -> bool:
+        return self.calendar is not None
+
+    @property
+    def event_count(self) -> int:
+        return len(self.calendar.walk("VEVENT")) if self.calendar is not None else 0
+
+
+def expand_inputs(specs: Iterable[str]) -> list[Path]:
+    """
+    Expand files, directories (their ``*.txt`` files) and glob patterns into a list of paths.
+
+    Paths are returned in the order given, without duplicates.
+    """
+    paths: dict[Path, None] = {}
+    for spec in specs:
+        path = Path(spec)
+        if path.is_dir():
+            matches = sorted(p for p in path.glob("*.txt") if p.is_file())
+        elif path.is_file():
+            matches = [path]
+        else:
+            matches = sorted(Path(p) for p in glob.glob(spec, recursive=True) if Path(p).is_file())
+        if not matches:
+            raise FileNotFoundError(f"No input files match {spec!r}")
+        paths.update((match.resolve(), None) for match in matches)
+    return list(paths)
+
+
+async def map_bounded(
+    func: Callable[[T], Awaitable[R]], items: Iterable[T], concurrency: int
+) -> AsyncIterator[R]:
+    """
+    Run ``func`` over ``items`` with at most ``concurrency`` calls in flight.
+
+    Items are pulled from the iterable lazily and results are yielded as they complete,
+    so arbitrarily long inputs are processed in constant memory.
+    """
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+
+    iterator = iter(items)
+    pending = {
+        asyncio.ensure_future(func(item)) for item in itertools.islice(iterator, concurrency)
+    }
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            pending.update(
+                asyncio.ensure_future(func(item)) for item in itertools.islice(iterator, len(done))
+            )
+            for task in done:
+                yield task.result()
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def convert_files(
+    paths: Iterable[Path],
+    api_key: str | None,
+    model: str,
+    language: str | None = None,
+    cache: ResultCache | None = None,
+    concurrency: int = 8,
+    prefilter: bool = False,
+    fast_path: bool = True,
+    max_attempts: int = 3,
+    limiter: "AdaptiveRateLimiter | None" = None,
+    hedge_model: str | None = None,
+    hedge_delay: float = 15.0,
+    cascade: Sequence[str] = (),
+) -> AsyncIterator[BatchResult]:
+    """
+    Convert every file in ``paths`` concurrently, yielding results as they finish.
+
+    Failures are reported on the result instead of aborting the batch.
+    """
+    from text2ics.converter import aprocess_content
+
+    async def convert(path: Path) -> BatchResult:
+        start = time.perf_counter()
+        result = BatchResult(path)
+        try:
+            content = path.read_text(encoding="utf-8")
+            if prefilter:
+                filtered = filter_relevant(content)
+                content, result.tokens_saved = filtered.text, filtered.saved_tokens
+            conversion = await aprocess_content(
+                content=content,
+                api_key=api_key,
+                model=model,
+                language=language,
+                cache=cache,
+                fast_path=fast_path,
+                max_attempts=max_attempts,
+                limiter=limiter,
+                hedge_model=hedge_model,
+                hedge_delay=hedge_delay,
+                cascade=cascade,
+            )
+            result.calendar, result.profile = conversion.calendar, conversion.profile
+        except Exception as e:
+            result.error = str(e) or type(e).__name__
+        result.elapsed = _since(start)
+        return result
+
+    async for result in map_bounded(convert, paths, concurrency):
+        yield result
+
+
+def _since(start: float) -> float:
+    return time.perf_counter() - start
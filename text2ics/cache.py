@@ -0,0 +1,175 @@
+"""
+Persistent, content-addressed cache of converted calendars.
+
+Entries are keyed by everything that determines the LLM output (input text, model,
+output language, reference date and the prompts) and hold the validated ICS bytes, so a
+repeated conversion is answered from disk without a round trip to the provider.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+
+from text2ics.system_prompt import extract_instructions, fix_instructions
+from text2ics.system_prompt import prompt as sys_prompt
+
+PROMPT_VERSION = hashlib.sha256(
+    "".join([sys_prompt, extract_instructions, fix_instructions]).encode("utf-8")
+).hexdigest()[:16]
+
+
+def default_cache_dir() -> Path:
+    """
+    Return the directory used when no explicit cache directory is given.
+    """
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "text2ics"
+
+
+def cache_key(
+    content: str, model: str, language: str | None = None, today: date | None = None
+) -> str:
+    """
+    Hash the inputs of a conversion into a stable cache key.
+
+    >>> cache_key("24/9 - Intro", "gpt-5") == cache_key("24/9 - Intro", "gpt-5")
+    True
+    >>> cache_key("24/9 - Intro", "gpt-5") == cache_key("24/9 - Intro", "gpt-5-mini")
+    False
+    >>> key = cache_key("24/9 - Intro", "gpt-5")
+    >>> key == cache_key("24/9 - Intro", "gpt-5", today=date(2025, 9, 1))
+    False
+    """
+    inputs = [PROMPT_VERSION, model, language, content]
+    if today is not None:  # a reference date other than the current one
+        inputs.append(today.isoformat())
+    payload = json.dumps(inputs, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class CacheStats:
+    """Counters for a single cache instance"""
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class ResultCache:
+    """
+    SQLite backed store of ICS bytes with size and age based eviction.
+
+    Entries older than ``max_age`` seconds are dropped, and when the total payload
+    exceeds ``max_bytes`` the least recently used entries are evicted first.
+    """
+
+    filename = "cache.sqlite3"
+
+    def __init__(
+        self,
+        directory: Path | str | None = None,
+        max_bytes: int = 256 * 1024 * 1024,
+        max_age: float | None = 30 * 24 * 3600,
+    ):
+        self.directory = Path(directory) if directory is not None else default_cache_dir()
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(
+            self.directory / self.filename, check_same_thread=False, isolation_level=None
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY,"
+            " ics BLOB NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " created REAL NOT NULL,"
+            " accessed REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+
+    def get(self, key: str) -> bytes | None:
+        """
+        Return the cached ICS bytes for ``key``, or None on a miss or expired entry.
+        """
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT ics, created FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or self._expired(row[1], now):
+                self.stats.misses += 1
+                return None
+            self._db.execute("UPDATE entries SET accessed = ? WHERE key = ?", (now, key))
+            self.stats.hits += 1
+            return row[0]
+
+    def put(self, key: str, ics: bytes) -> None:
+        """
+        Store ``ics`` under ``key`` and evict entries beyond the configured limits.
+        """
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries (key, ics, size, created, accessed)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (key, ics, len(ics), now, now),
+            )
+            self._evict(now)
+
+    def clear(self) -> None:
+        """Remove every entry from the cache"""
+        with self._lock:
+            self._db.execute("DELETE FROM entries")
+
+    @property
+    def size(self) -> int:
+        """Total number of ICS bytes currently stored"""
+        with self._lock:
+            return self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def close(self) -> None:
+        self._db.close()
+
+    def _expired(self, created: float, now: float) -> bool:
+        return self.max_age is not None and now - created > self.max_age
+
+    def _evict(self, now: float) -> None:
+        if self.max_age is not None:
+            cursor = self._db.execute(
+                "DELETE FROM entries WHERE created < ?", (now - self.max_age,)
+            )
+            self.stats.evictions += max(cursor.rowcount, 0)
+
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        for key, size in self._db.execute(
+            "SELECT key, size FROM entries ORDER BY accessed ASC"
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+            self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+            total -= size
+            self.stats.evictions += 1
@@ -0,0 +1,62 @@
+"""
+Splitting of long inputs into chunks that can be extracted independently.
+
+Boundaries follow the DETECTION rules of the system prompt: chunks break between
+paragraphs, and paragraphs that are too long break before date-led event lines such as
+``24/9 - Session 1``, so a single event never straddles two chunks.
+"""
+
+import re
+
+DATE_LED_LINE = re.compile(r"^\s*\d{1,2}\s*[./]\s*\d{1,2}\b")
+PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+
+
+def _split_paragraph(paragraph: str, max_chars: int) -> list[str]:
+    """Split a paragraph before date-led lines, then hard-wrap anything still too long"""
+    pieces: list[list[str]] = [[]]
+    for line in paragraph.splitlines():
+        if DATE_LED_LINE.match(line) and pieces[-1]:
+            pieces.append([])
+        pieces[-1].append(line)
+
+    blocks: list[str] = []
+    for piece in ("\n".join(lines) for lines in pieces):
+        blocks.extend(piece[i : i + max_chars] for i in range(0, len(piece), max_chars))
+    return blocks
+
+
+def split_content(content: str, max_chars: int = 8000, overlap: int = 1) -> list[str]:
+    """
+    Split ``content`` into chunks of at most roughly ``max_chars`` characters.
+
+    The last ``overlap`` blocks of a chunk are repeated at the start of the next one so
+    headings and context that apply to the following events are not lost. Events that
+    end up in two chunks are removed again when the results are merged.
+
+    >>> split_content("short text")
+    ['short text']
+    >>> text = "Program\\n\\n24/9 - Intro\\n1/10 - Yoga\\n8/10 - Pilates"
+    >>> split_content(text, max_chars=25, overlap=0)
+    ['Program\\n\\n24/9 - Intro', '1/10 - Yoga\\n\\n8/10 - Pilates']
+    """
+    if len(content) <= max_chars:
+        return [content]
+
+    blocks: list[str] = []
+    for paragraph in PARAGRAPH_BREAK.split(content.strip()):
+        if len(paragraph) > max_chars or ("\n" in paragraph and len(paragraph) > max_chars // 2):
+            blocks.extend(_split_paragraph(paragraph, max_chars))
+        else:
+            blocks.append(paragraph)
+
+    chunks: list[list[str]] = [[]]
+    size = 0
+    for block in blocks:
+        if chunks[-1] and size + len(block) > max_chars:
+            carried = chunks[-1][-overlap:] if overlap else []
+            chunks.append(list(carried))
+            size = sum(len(b) for b in carried)
+        chunks[-1].append(block)
+        size += len(block)
+    return ["\n\n".join(chunk) for chunk in chunks]
@@ -1,12 +1,136 @@
+import json
 from pathlib import Path
+from typing import TYPE_CHECKING
 
+import click
 import typer
 from rich import print  # noqa A004
+from rich.console import Console
+from typer.core import TyperGroup
 from typing_extensions import Annotated
 
-app = typer.Typer()
+if TYPE_CHECKING:
+    from rich.table import Table
 
-@app.command()
+    from .batch import BatchResult
+
+
+class DefaultCommandGroup(TyperGroup):
+    """
+    Command group that falls back to ``convert`` when no subcommand is named, so that
+    ``text2ics notes.txt`` keeps working next to ``text2ics batch ...``.
+    """
+
+    default_command = "convert"
+
+    def parse_args(self, ctx: click.Context, args: list[str]) -> list[str]:
+        group_options = {opt for param in self.get_params(ctx) for opt in param.opts}
+        if args and args[0] not in self.commands and args[0] not in group_options:
+            args = [self.default_command, *args]
+        return super().parse_args(ctx, args)
+
+
+app = typer.Typer(cls=DefaultCommandGroup)
+stderr = Console(stderr=True)
+
+
+def _print_version(value: bool) -> None:
+    if value:
+        from importlib.metadata import version
+
+        typer.echo(f"text2ics {version('text2ics')}")
+        raise typer.Exit()
+
+
+@app.callback()
+def cli(
+    version: Annotated[
+        bool,
+        typer.Option(
+            "--version", callback=_print_version, is_eager=True, help="Show the version and exit."
+        ),
+    ] = False,
+):
+    """
+    Convert unstructured text into ICS calendar files using an LLM.
+    """
+
+
+ApiKeyOption = Annotated[
+    str | None,
+    typer.Option(
+        envvar=[f"{vendor}_API_KEY" for vendor in ["OPENAI", "CLAUDE", "GEMINI", "TEXT2ICS"]],
+        show_envvar=False,
+        help=(
+            "API key for the LLM service. Defaults to $<OPENAI|CLAUDE|GEMINI|TEXT2ICS>_API_KEY, "
+            "also from a .env file, read only when the LLM is called."
+        ),
+    ),
+]
+ModelOption = Annotated[str, typer.Option(help="What model to use.")]
+LanguageOption = Annotated[
+    str | None,
+    typer.Option(help="Specify the output language for the ICS file. Defaults to autodetection"),
+]
+CacheDirOption = Annotated[
+    Path | None,
+    typer.Option(
+        file_okay=False,
+        dir_okay=True,
+        resolve_path=True,
+        help="Directory for the conversion cache. Defaults to $XDG_CACHE_HOME/text2ics.",
+    ),
+]
+NoCacheOption = Annotated[
+    bool,
+    typer.Option("--no-cache", help="Always call the LLM and do not store the result."),
+]
+PrefilterOption = Annotated[
+    bool,
+    typer.Option(
+        "--prefilter",
+        help="Only send lines with date/time signals (and their context) to the LLM.",
+    ),
+]
+MaxAttemptsOption = Annotated[
+    int,
+    typer.Option(min=1, help="Maximum LLM calls per input when the output is invalid ICS."),
+]
+ProfileOption = Annotated[
+    bool,
+    typer.Option(
+        "--profile",
+        help="Print timings, token counts, retries and cache status as JSON to stderr.",
+    ),
+]
+HedgeModelOption = Annotated[
+    str | None,
+    typer.Option(
+        help="Also send requests the model is slow to answer to this model; the first valid "
+        "calendar wins.",
+    ),
+]
+HedgeDelayOption = Annotated[
+    float,
+    typer.Option(min=0, help="Seconds without an answer or event before --hedge-model is asked."),
+]
+CascadeOption = Annotated[
+    list[str] | None,
+    typer.Option(
+        help="Cheaper model to try before --model, escalating only when its calendar is "
+        "invalid or implausible. Repeat to try several in order.",
+    ),
+]
+FastPathOption = Annotated[
+    bool,
+    typer.Option(
+        "--fast-path/--no-fast-path",
+        help="Convert lines like '24/9 - Title kl. 19-21' locally without calling the LLM.",
+    ),
+]
+
+
+@app.command("convert")
 def main(
     text_file: Annotated[
         Path,
@@ -19,32 +143,392 @@ def main(
             help="Path to the input text file.",
         ),
     ],
-    api_key: Annotated[
-        str,
+    api_key: ApiKeyOption = None,
+    model: ModelOption = "gpt-5",
+    language: LanguageOption = None,
+    cache_dir: CacheDirOption = None,
+    no_cache: NoCacheOption = False,
+    prefilter: PrefilterOption = False,
+    fast_path: FastPathOption = True,
+    max_attempts: MaxAttemptsOption = 3,
+    hedge_model: HedgeModelOption = None,
+    hedge_delay: HedgeDelayOption = 15.0,
+    cascade: CascadeOption = None,
+    stream: Annotated[
+        bool,
+        typer.Option("--stream", help="Print each event as soon as the LLM has produced it."),
+    ] = False,
+    profile: ProfileOption = False,
+):
+    """
+    Reads input text from a file, processes it to generate an ICS calendar, and prints the result.
+    """
+    from .cache import ResultCache
+    from .converter import InvalidCalendarError, process_content
+    from .relevance import filter_relevant
+
+    with open(text_file, "r", encoding="utf-8") as f:
+        text_from_file = f.read()
+
+    if prefilter:
+        filtered = filter_relevant(text_from_file)
+        stderr.print(filtered.report())
+        text_from_file = filtered.text
+
+    cache = None if no_cache else ResultCache(cache_dir)
+    if stream:
+        from .ics import prodid
+
+        typer.echo(f"BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:{prodid()}\r\n", nl=False)
+
+    try:
+        result = process_content(
+            content=text_from_file,
+            api_key=api_key,
+            model=model,
+            language=language,
+            cache=cache,
+            fast_path=fast_path,
+            max_attempts=max_attempts,
+            hedge_model=hedge_model,
+            hedge_delay=hedge_delay,
+            cascade=cascade or (),
+            on_event=(lambda event: typer.echo(event.to_ical(), nl=False)) if stream else None,
+        )
+    except InvalidCalendarError as e:
+        stderr.print(f"[red]{e}[/red]")
+        raise typer.Exit(code=1)
+    if stream:
+        typer.echo("END:VCALENDAR\r\n", nl=False)
+    else:
+        print(result.ics.decode("utf-8"))
+    if profile:
+        typer.echo(json.dumps(result.profile.to_dict(), indent=2), err=True)
+
+
+@app.command()
+def batch(
+    inputs: Annotated[
+        list[str],
+        typer.Argument(help="Input text files, directories of *.txt files or glob patterns."),
+    ],
+    api_key: ApiKeyOption = None,
+    model: ModelOption = "gpt-5",
+    language: LanguageOption = None,
+    output_dir: Annotated[
+        Path | None,
+        typer.Option(
+            file_okay=False,
+            dir_okay=True,
+            resolve_path=True,
+            help="Write one .ics per input here. Defaults to next to each input file.",
+        ),
+    ] = None,
+    merge: Annotated[
+        Path | None,
+        typer.Option(
+            dir_okay=False,
+            help="Write a single calendar with all events to this file ('-' for stdout).",
+        ),
+    ] = None,
+    concurrency: Annotated[
+        int, typer.Option(min=1, help="Maximum number of conversions in flight.")
+    ] = 8,
+    cache_dir: CacheDirOption = None,
+    no_cache: NoCacheOption = False,
+    prefilter: PrefilterOption = False,
+    fast_path: FastPathOption = True,
+    max_attempts: MaxAttemptsOption = 3,
+    hedge_model: HedgeModelOption = None,
+    hedge_delay: HedgeDelayOption = 15.0,
+    cascade: CascadeOption = None,
+    profile: ProfileOption = False,
+):
+    """
+    Converts many text files concurrently and prints a per-file summary.
+    """
+    import asyncio
+
+    from .batch import convert_files, expand_inputs
+    from .cache import ResultCache
+    from .ics import merge_calendars
+
+    try:
+        paths = expand_inputs(inputs)
+    except FileNotFoundError as e:
+        raise typer.BadParameter(str(e), param_hint="INPUTS")
+
+    if output_dir is not None:
+        output_dir.mkdir(parents=True, exist_ok=True)
+
+    cache = None if no_cache else ResultCache(cache_dir)
+
+    async def run() -> "list[BatchResult]":
+        results: list[BatchResult] = []
+        async for result in convert_files(
+            paths,
+            api_key,
+            model,
+            language,
+            cache=cache,
+            concurrency=concurrency,
+            prefilter=prefilter,
+            fast_path=fast_path,
+            max_attempts=max_attempts,
+            hedge_model=hedge_model,
+            hedge_delay=hedge_delay,
+            cascade=cascade or (),
+        ):
+            if result.calendar is not None and merge is None:
+                target = (output_dir or result.source.parent) / f"{result.source.stem}.ics"
+                target.write_bytes(result.calendar.to_ical())
+                result.output = target
+            status = "[green]ok[/green]" if result.ok else f"[red]failed: {result.error}[/red]"
+            stderr.print(f"{result.source.name}: {status} ({result.elapsed:.2f}s)")
+            results.append(result)
+        return results
+
+    results = asyncio.run(run())
+
+    if merge is not None:
+        merged = merge_calendars(r.calendar for r in results if r.calendar is not None).to_ical()
+        if str(merge) == "-":
+            typer.echo(merged, nl=False)
+        else:
+            merge.write_bytes(merged)
+
+    stderr.print(summary_table(results))
+    if profile:
+        profiles = [
+            {
+                "source": str(result.source),
+                "elapsed": result.elapsed,
+                "profile": result.profile.to_dict() if result.profile else None,
+            }
+            for result in results
+        ]
+        typer.echo(json.dumps(profiles, indent=2), err=True)
+    if not all(result.ok for result in results):
+        raise typer.Exit(code=1)
+
+
+@app.command()
+def ingest(
+    mailbox: Annotated[
+        Path,
+        typer.Argument(exists=True, resolve_path=True, help="An mbox file or a maildir directory."),
+    ],
+    output_dir: Annotated[
+        Path,
         typer.Option(
-            ...,
-            envvar=[f"{vendor}_API_KEY" for vendor in ["OPENAI", "CLAUDE", "GEMINI", "TEXT2ICS"]],
-            help="API key for the LLM service.",
+            file_okay=False,
+            dir_okay=True,
+            resolve_path=True,
+            help="Write one .ics per converted message here.",
         ),
     ],
-    model: Annotated[str, typer.Option(help="What model to use.")] = "gpt-5",
-    language: Annotated[
-        str,
+    api_key: ApiKeyOption = None,
+    model: ModelOption = "gpt-5",
+    language: LanguageOption = None,
+    journal: Annotated[
+        Path | None,
+        typer.Option(
+            dir_okay=False,
+            help="Record of the finished messages, to resume an interrupted run. "
+            "Defaults to journal.jsonl in --output-dir.",
+        ),
+    ] = None,
+    merge: Annotated[
+        Path | None,
         typer.Option(
-            help="Specify the output language for the ICS file. Defaults to autodetection"
+            dir_okay=False,
+            help="Also write a single calendar with all events converted so far to this file.",
         ),
     ] = None,
+    concurrency: Annotated[
+        int, typer.Option(min=1, help="Maximum number of conversions in flight.")
+    ] = 8,
+    cache_dir: CacheDirOption = None,
+    no_cache: NoCacheOption = False,
+    prefilter: PrefilterOption = False,
+    fast_path: FastPathOption = True,
+    max_attempts: MaxAttemptsOption = 3,
+    hedge_model: HedgeModelOption = None,
+    hedge_delay: HedgeDelayOption = 15.0,
+    cascade: CascadeOption = None,
 ):
     """
-    Reads input text from a file, processes it to generate an ICS calendar, and prints the result.
+    Converts the messages of a mailbox concurrently, reading it one message at a time.
+
+    Messages without dates or times are skipped. Run it again after an interruption to
+    resume where it stopped; failed messages are tried again.
     """
-    from .converter import process_content
+    import asyncio
+    import hashlib
 
-    with open(text_file, "r", encoding="utf-8") as f:
-        text_from_file = f.read()
+    from .cache import ResultCache
+    from .mail import Journal, convert_messages, read_messages
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    log = Journal(journal or output_dir / "journal.jsonl")
+    finished = log.finished()
+    counts = {"ok": 0, "skipped": 0, "failed": 0}
+    events = 0
+
+    async def run() -> None:
+        nonlocal events
+        messages = (message for message in read_messages(mailbox) if message.key not in finished)
+        async for result in convert_messages(
+            messages,
+            api_key,
+            model,
+            language,
+            cache=None if no_cache else ResultCache(cache_dir),
+            concurrency=concurrency,
+            prefilter=prefilter,
+            fast_path=fast_path,
+            max_attempts=max_attempts,
+            hedge_model=hedge_model,
+            hedge_delay=hedge_delay,
+            cascade=cascade or (),
+        ):
+            if result.calendar is not None:
+                name = hashlib.sha256(result.key.encode("utf-8")).hexdigest()[:16]
+                result.output = output_dir / f"{name}.ics"
+                result.output.write_bytes(result.calendar.to_ical())
+                events += result.event_count
+            log.record(result)
+            counts[result.status] += 1
+            status = {
+                "ok": f"[green]{result.event_count} event(s)[/green]",
+                "skipped": "[dim]skipped, no dates[/dim]",
+                "failed": f"[red]failed: {result.error}[/red]",
+            }[result.status]
+            stderr.print(f"{result.subject or result.key}: {status}")
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        stderr.print("Interrupted; run the same command again to resume")
+        raise typer.Exit(code=130)
+    finally:
+        stderr.print(
+            f"{counts['ok']} messages converted ({events} events), {counts['skipped']} "
+            f"skipped without dates, {counts['failed']} failed, {len(finished)} already done"
+        )
+
+    if merge is not None:
+        from icalendar import Calendar
+
+        from .ics import merge_calendars
+
+        outputs = {Path(entry["output"]) for entry in log.entries() if entry["output"]}
+        calendars = (
+            Calendar.from_ical(output.read_bytes().decode("utf-8"))
+            for output in sorted(outputs)
+            if output.exists()
+        )
+        merge.write_bytes(merge_calendars(calendars, deduplicate=True).to_ical())
+    if counts["failed"]:
+        raise typer.Exit(code=1)
+
+
+@app.command()
+def serve(
+    api_key: ApiKeyOption = None,
+    model: Annotated[str, typer.Option(help="Model used when a request names none.")] = "gpt-5",
+    language: LanguageOption = None,
+    host: Annotated[str, typer.Option(help="Interface to listen on.")] = "127.0.0.1",
+    port: Annotated[int, typer.Option(help="TCP port to listen on.")] = 8765,
+    socket: Annotated[
+        Path | None,
+        typer.Option(dir_okay=False, help="Listen on this Unix socket instead of TCP."),
+    ] = None,
+    concurrency: Annotated[
+        int, typer.Option(min=1, help="Maximum number of conversions in flight.")
+    ] = 8,
+    queue_size: Annotated[
+        int, typer.Option(min=1, help="Requests that may wait before new ones get a 503.")
+    ] = 64,
+    cache_dir: CacheDirOption = None,
+    no_cache: NoCacheOption = False,
+    fast_path: FastPathOption = True,
+    max_attempts: MaxAttemptsOption = 3,
+    hedge_model: HedgeModelOption = None,
+    hedge_delay: HedgeDelayOption = 15.0,
+    cascade: CascadeOption = None,
+):
+    """
+    Keeps the converter loaded and serves conversions over local HTTP or a Unix socket.
+
+    POST the text to /convert to get the ICS back (or JSON with 'Accept: application/json');
+    GET /health and /metrics for monitoring.
+    """
+    import asyncio
+
+    from .cache import ResultCache
+    from .server import ConversionServer
 
-    ics_calendar = process_content(
-        content=text_from_file, api_key=api_key, model=model, language=language
+    server = ConversionServer(
+        api_key=api_key,
+        model=model,
+        language=language,
+        cache=None if no_cache else ResultCache(cache_dir),
+        concurrency=concurrency,
+        queue_size=queue_size,
+        fast_path=fast_path,
+        max_attempts=max_attempts,
+        hedge_model=hedge_model,
+        hedge_delay=hedge_delay,
+        cascade=cascade or (),
     )
-    print(ics_calendar.to_ical().decode("utf-8"))
+    stderr.print(f"Serving conversions on {socket or f'http://{host}:{port}'}")
+    try:
+        asyncio.run(server.serve(host, port, str(socket) if socket else None))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if socket is not None:
+            socket.unlink(missing_ok=True)
+
 
+def summary_table(results: "list[BatchResult]") -> "Table":
+    """Build the per-file summary printed after a batch run"""
+    from rich.table import Table
+
+    from .ratelimit import default_limiter
+
+    table = Table(title="text2ics batch summary")
+    table.add_column("Input")
+    table.add_column("Status")
+    table.add_column("Events", justify="right")
+    table.add_column("Seconds", justify="right")
+    table.add_column("Output")
+
+    for result in sorted(results, key=lambda r: str(r.source)):
+        table.add_row(
+            str(result.source),
+            "ok" if result.ok else f"failed: {result.error}",
+            str(result.event_count),
+            f"{result.elapsed:.2f}",
+            str(result.output or ""),
+        )
+
+    succeeded = sum(result.ok for result in results)
+    from .converter import conversion_stats
+
+    limiter = default_limiter.stats
+    table.caption = (
+        f"{succeeded}/{len(results)} converted, "
+        f"{sum(result.event_count for result in results)} events, "
+        f"~{sum(result.tokens_saved for result in results)} prompt tokens saved, "
+        f"{conversion_stats.repaired} outputs repaired locally, "
+        f"{conversion_stats.regenerated} regenerated, "
+        f"{conversion_stats.events_fixed} events fixed, "
+        f"{conversion_stats.events_dropped} dropped, "
+        f"{conversion_stats.hedged} hedged ({conversion_stats.hedge_wins} won by the hedge), "
+        f"{conversion_stats.escalated} escalated, "
+        f"{limiter.rate_limited} rate limited "
+        f"(settled at {limiter.rate:.1f} req/s, {limiter.concurrency_limit} in flight)"
+    )
+    return table
@@ -1,83 +1,1048 @@
-from importlib.metadata import version
-from typing import TYPE_CHECKING
+import asyncio
+import concurrent.futures
+import functools
+import hashlib
+import logging
+import os
+import queue
+import re
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Awaitable, Callable, Coroutine, Iterator, Sequence
+from contextvars import ContextVar
+from dataclasses import dataclass
+from datetime import date
+from typing import TYPE_CHECKING, Any, TypeVar, cast
 
 import icalendar
-from dotenv import load_dotenv
-from litellm.exceptions import RateLimitError
-from promptic import Promptic
-from rich import print  # noqa A004
-from tenacity import (
-    retry,
-    retry_if_exception_type,
-    stop_after_attempt,
-    wait_exponential,
-)
 
+from text2ics.cache import ResultCache, cache_key
+from text2ics.chunking import split_content
+from text2ics.ics import (
+    VEventStream,
+    calendar_problems,
+    event_fingerprint,
+    event_problems,
+    merge_calendars,
+    new_calendar,
+    prodid,
+    repair_ics,
+)
+from text2ics.metrics import ConversionProfile, MetricCallback, profiling, record
+from text2ics.ratelimit import AdaptiveRateLimiter, default_limiter
+from text2ics.relevance import estimate_tokens, filter_relevant
+from text2ics.result import ConversionResult
+from text2ics.rules import parse_schedule
+from text2ics.system_prompt import extract_instructions, fix_instructions
 from text2ics.system_prompt import prompt as sys_prompt
 
+# litellm, promptic and tenacity are imported where an LLM is actually called: litellm
+# alone takes seconds to import, which dominates cache hits and locally parsed inputs.
 if TYPE_CHECKING:
     from icalendar import Component
+    from promptic import Promptic
+    from tenacity import AttemptManager
 
-load_dotenv()
+EventCallback = Callable[["Component"], None]
+T = TypeVar("T")
 
+# status goes to the log rather than stdout, which may carry the ICS output
+logger = logging.getLogger(__name__)
 
-@retry(
-    wait=wait_exponential(multiplier=1, min=2, max=10),  # Exponential backoff
-    stop=stop_after_attempt(5),  # Retry up to 5 times
-    retry=retry_if_exception_type(RateLimitError),  # Retry on rate limit errors
-)
-def call_llm_with_retry(promptic: Promptic, content: str, language: str|None = None) -> str:
-    """
-    Call the LLM with retry logic for handling rate limits.
-    """
-    output_language = (
+# the date the running conversion resolves dates without a year from, None for today
+_today: ContextVar[date | None] = ContextVar("text2ics_today", default=None)
+
+
+@functools.cache
+def load_environment() -> None:
+    """Load API keys from a .env file, once, when the first LLM call needs them"""
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+
+def _output_language(language: str | None = None) -> str:
+    return (
         f"the produced calendar content language must be in {language}"
         if language is not None
         else "Output language must be the same as the dominant language of the event content"
     )
 
-    response = promptic.completion(
-        messages=[
-            {"role": "system", "content": sys_prompt},
-            {
-                "role": "user",
-                "content": (
-                    f"""Extract the events from the <INPUT>...</INPUT> section and output as a raw ICS text block containing all event described in the text
 
-                    OUTPUT_LANGUAGE: {output_language}
+def build_messages(content: str, language: str | None = None) -> list[dict[str, str]]:
+    """
+    Build the chat messages asking the LLM to extract the events of ``content``.
 
-                    <INPUT>{content}</INPUT>"""
-                ),
-            },
-        ]
+    The system messages are static, so they form a prompt prefix the provider can cache;
+    everything that varies between requests goes in the final user message.
+    """
+    today = _today.get()
+    reference = f"REFERENCE_DATE: {today.isoformat()}\n" if today is not None else ""
+    return [
+        {"role": "system", "content": sys_prompt},
+        {"role": "system", "content": extract_instructions},
+        {
+            "role": "user",
+            "content": f"{reference}OUTPUT_LANGUAGE: {_output_language(language)}\n\n"
+            f"<INPUT>{content}</INPUT>",
+        },
+    ]
+
+
+def build_fix_messages(
+    fragments: list[tuple[str, list[str], str]], language: str | None = None
+) -> list[dict[str, str]]:
+    """
+    Build the chat messages asking the LLM to fix only the given broken VEVENTs.
+
+    Each fragment is the invalid VEVENT block, its problems and the source text span
+    the event was extracted from.
+    """
+    sections = "\n\n".join(
+        f"<EVENT>\n{block.strip()}\n</EVENT>\n<PROBLEMS>{'; '.join(problems)}</PROBLEMS>\n"
+        f"<INPUT>{span}</INPUT>"
+        for block, problems, span in fragments
     )
+    return [
+        {"role": "system", "content": sys_prompt},
+        {"role": "system", "content": fix_instructions},
+        {
+            "role": "user",
+            "content": f"OUTPUT_LANGUAGE: {_output_language(language)}\n\n{sections}",
+        },
+    ]
 
-    combined_content = "\n".join(choice.message.content for choice in response.choices)
-    return combined_content
 
+async def acall_llm_with_retry(
+    promptic: "Promptic",
+    content: str,
+    language: str | None = None,
+    limiter: AdaptiveRateLimiter | None = None,
+    on_event: EventCallback | None = None,
+    messages: list[dict[str, str]] | None = None,
+) -> str:
+    """
+    Call the LLM with retry logic for handling rate limits.
+    ``messages`` replaces the extraction prompt built from ``content`` when given.
+
+    Every attempt holds a slot of the process-wide ``limiter``. A rate limit error pauses
+    the limiter for as long as the provider asked, so the retry (and every other
+    conversion in flight) waits there instead of sleeping on its own schedule.
 
-def process_content(content: str, api_key: str, model: str, language: str|None = None) -> "Component":
+    With ``on_event`` the completion is streamed and every VEVENT is handed to the
+    callback as soon as its ``END:VEVENT`` line arrives.
     """
-    Process the content using the LLM and ensure the generated ICS calendar is valid.
-    Retries until a valid calendar is produced.
+    from litellm.exceptions import RateLimitError
+    from tenacity import AsyncRetrying, retry_if_exception_type, stop_after_attempt
+
+    limiter = limiter or default_limiter
+    retrying = AsyncRetrying(
+        stop=stop_after_attempt(8),  # Retry up to 8 times, paced by the limiter
+        retry=retry_if_exception_type(RateLimitError),  # Retry on rate limit errors
+        reraise=True,
+    )
+    kind = "extract" if messages is None else "fix"
+    started = time.perf_counter()
+    messages = messages or build_messages(content, language)
+    record("prompt_build", seconds=_since(started))
+    async for attempt in retrying:
+        with attempt:
+            async with limiter.slot():
+                requested = time.perf_counter()
+                if on_event is None:
+                    response = await _acomplete(promptic, messages=messages)
+                    text = "\n".join(choice.message.content for choice in response.choices)
+                    _record_llm_call(kind, requested, None, messages, text, response, attempt)
+                    return text
+
+                stream = VEventStream()
+                first_token = usage_chunk = None
+                async for chunk in await _acomplete(
+                    promptic, messages=messages, stream=True, stream_options={"include_usage": True}
+                ):
+                    if getattr(chunk, "usage", None):
+                        usage_chunk = chunk
+                    if not chunk.choices:
+                        continue
+                    if first_token is None:
+                        first_token = _since(requested)
+                    for event in stream.feed(chunk.choices[0].delta.content or ""):
+                        on_event(event)
+                _record_llm_call(
+                    kind, requested, first_token, messages, stream.text, usage_chunk, attempt
+                )
+                return stream.text
+    raise AssertionError("unreachable: tenacity reraises the last error")
+
+
+def _acomplete(promptic: "Promptic", **kwargs: Any) -> Awaitable[Any]:
+    """Request a completion, awaitable as the Promptic clients use litellm's acompletion"""
+    return cast("Callable[..., Awaitable[Any]]", promptic.completion)(**kwargs)
+
+
+def _record_llm_call(
+    kind: str,
+    requested: float,
+    first_token: float | None,
+    messages: list[dict[str, str]],
+    output: str,
+    response: Any,
+    attempt: "AttemptManager",
+) -> None:
+    """Report an LLM call, estimating the tokens when the provider sent no usage"""
+    usage = getattr(response, "usage", None)
+    details = getattr(usage, "prompt_tokens_details", None)
+    record(
+        "llm_call",
+        kind=kind,
+        seconds=_since(requested),
+        time_to_first_token=first_token,
+        input_tokens=getattr(usage, "prompt_tokens", None)
+        or sum(estimate_tokens(message["content"]) for message in messages),
+        output_tokens=getattr(usage, "completion_tokens", None) or estimate_tokens(output),
+        cached_tokens=getattr(details, "cached_tokens", None) or 0,
+        retries=attempt.retry_state.attempt_number - 1,
+    )
+
+
+class InvalidCalendarError(ValueError):
+    """The LLM did not produce a valid calendar within the allowed number of attempts"""
+
+    def __init__(self, attempts: int, output: str):
+        super().__init__(f"No valid calendar produced after {attempts} attempt(s)")
+        self.attempts = attempts
+        self.output = output
+
+
+@dataclass
+class ConversionStats:
+    """Process-wide counters of how LLM outputs were turned into calendars"""
+
+    valid: int = 0
+    repaired: int = 0
+    regenerated: int = 0
+    failed: int = 0
+    salvaged: int = 0
+    events_fixed: int = 0
+    events_dropped: int = 0
+    hedged: int = 0
+    hedge_wins: int = 0
+    escalated: int = 0
+    coalesced: int = 0
+
+
+conversion_stats = ConversionStats()
+
+
+def parse_calendar(ics_calendar_str: str) -> "tuple[Component, bool]":
+    """
+    Parse LLM output into a calendar, repairing it locally when it does not parse as is.
+
+    Returns the calendar and whether a repair was needed; raises ``ValueError`` when
+    the output is invalid even after :func:`repair_ics`.
+    """
+    try:
+        return icalendar.Calendar.from_ical(ics_calendar_str), False
+    except ValueError:
+        return icalendar.Calendar.from_ical(repair_ics(ics_calendar_str)), True
+
+
+def _split_events(
+    calendar: "Component | None", text: str
+) -> "tuple[Component | None, list[tuple[str, list[str]]]]":
+    """
+    Separate the usable VEVENTs of an LLM output from the broken ones.
+
+    Returns a calendar holding only usable events (None when the output contains no
+    events at all) and the broken VEVENT blocks with their problems.
+    """
+    if calendar is not None:
+        broken: list[tuple[str, list[str]]] = []
+        for event in list(calendar.walk("VEVENT")):
+            if problems := event_problems(event):
+                broken.append((event.to_ical().decode("utf-8"), problems))
+                calendar.subcomponents.remove(event)
+        return calendar, broken
+
+    stream = VEventStream()
+    events = stream.feed(text)
+    if not events and not stream.rejected:
+        return None, []
+    calendar = new_calendar()
+    for event in events:
+        calendar.add_component(event)
+    return calendar, stream.rejected
+
+
+_SUMMARY_LINE = re.compile(r"^SUMMARY[^:]*:(?P<summary>.*)$", re.MULTILINE)
+_UID_LINE = re.compile(r"^UID[^:]*:(?P<uid>.*)$", re.MULTILINE)
+_WORD = re.compile(r"\w{4,}")
+
+
+def _source_span(content: str, block: str, context: int = 2) -> str:
+    """
+    Find the lines of ``content`` a VEVENT block was most likely extracted from.
+
+    Lines are matched on the words of the event's SUMMARY; the best matching line is
+    returned with ``context`` lines around it, or the whole content when nothing matches.
+    """
+    unfolded = re.sub(r"\r?\n[ \t]", "", block)
+    match = _SUMMARY_LINE.search(unfolded)
+    words = {word.casefold() for word in _WORD.findall(match["summary"] if match else "")}
+    if not words:
+        return content
+
+    lines = content.splitlines()
+    scores = [sum(word in line.casefold() for word in words) for line in lines]
+    best = max(range(len(lines)), key=scores.__getitem__, default=None)
+    if best is None or not scores[best]:
+        return content
+    return "\n".join(lines[max(best - context, 0) : best + context + 1])
+
+
+async def _afix_events(
+    promptic: "Promptic",
+    content: str,
+    broken: list[tuple[str, list[str]]],
+    language: str | None = None,
+    limiter: AdaptiveRateLimiter | None = None,
+    attempts: int = 1,
+) -> "tuple[list[Component], int]":
+    """
+    Send only the broken VEVENTs and their source text back to the LLM for fixing.
+
+    Returns the fixed events and the number of events still broken after ``attempts``
+    follow-up calls.
+    """
+    fixed: list[Component] = []
+    for _ in range(attempts):
+        if not broken:
+            break
+        fragments = [(block, problems, _source_span(content, block)) for block, problems in broken]
+        messages = build_fix_messages(fragments, language)
+        output = await acall_llm_with_retry(promptic, content, language, limiter, messages=messages)
+        stream = VEventStream()
+        events, broken = _match_fixes(broken, stream.feed(output), stream.rejected)
+        fixed.extend(events)
+    return fixed, len(broken)
+
+
+def _match_fixes(
+    broken: list[tuple[str, list[str]]],
+    events: "list[Component]",
+    rejected: list[tuple[str, list[str]]],
+) -> "tuple[list[Component], list[tuple[str, list[str]]]]":
+    """
+    Pair the answer to a fix request with the broken blocks it was asked to fix.
+
+    Answers are matched on UID, then on SUMMARY, at most one per block; answers that
+    match no block, like repeats of events that were valid already, are ignored. Returns
+    the fixed events and the blocks still broken: those answered with another broken
+    block, which takes its place, and those left unanswered.
+    """
+    identities = dict(enumerate(_block_identity(block) for block, _ in broken))
+    answers: dict[int, Component | tuple[str, list[str]]] = {}
+
+    def claim(uid: str, summary: str) -> int | None:
+        for position, value in enumerate((uid, summary)):
+            for i, identity in identities.items():
+                if value and identity[position] == value and i not in answers:
+                    return i
+        return None
+
+    for event in events:
+        if (index := claim(str(event.get("UID", "")), event_fingerprint(event)[0])) is not None:
+            answers[index] = event
+    for block, problems in rejected:
+        if (index := claim(*_block_identity(block))) is not None:
+            answers[index] = (block, problems)
+
+    fixed = [answer for answer in answers.values() if not isinstance(answer, tuple)]
+    still_broken = [answer for answer in answers.values() if isinstance(answer, tuple)]
+    return fixed, still_broken + [broken[i] for i in identities if i not in answers]
+
+
+def _block_identity(block: str) -> tuple[str, str]:
+    """The UID and normalized SUMMARY of a VEVENT block, empty when missing"""
+    unfolded = re.sub(r"\r?\n[ \t]", "", block)
+    uid = _UID_LINE.search(unfolded)
+    summary = _SUMMARY_LINE.search(unfolded)
+    return (
+        uid["uid"].strip() if uid else "",
+        " ".join(summary["summary"].split()).casefold() if summary else "",
+    )
+
+
+async def aextract_calendar(
+    promptic: "Promptic",
+    content: str,
+    language: str | None = None,
+    limiter: AdaptiveRateLimiter | None = None,
+    on_event: EventCallback | None = None,
+    max_attempts: int = 3,
+    salvage: bool = True,
+) -> "Component":
+    """
+    Ask the LLM for the calendar of ``content`` until it produces a valid one.
+
+    Invalid output is first repaired locally. When single VEVENTs are still broken, the
+    valid events are kept and only the broken ones are sent back, together with the
+    lines of ``content`` they came from; events that cannot be fixed are dropped. Output
+    without any usable event is regenerated. At most ``max_attempts`` LLM calls are made
+    in total. Without ``salvage``, output with broken events is regenerated as a whole.
     """
-    # Initialize a Promptic instance with the dynamic API key and model
-    promptic = Promptic(model=model, api_key=api_key)
-    complete = False
     ics_calendar_str = ""
-    while not complete:
-        try:
-            # Call the LLM with retry logic
-            ics_calendar_str = call_llm_with_retry(promptic, content, language)
+    attempt = 0
+    while attempt < max_attempts:
+        attempt += 1
+        # Call the LLM with retry logic
+        ics_calendar_str = await acall_llm_with_retry(
+            promptic, content, language, limiter, on_event
+        )
 
-            # Validate the generated ICS calendar by parsing it.
-            icalendar.Calendar.from_ical(ics_calendar_str)
-            complete = True
+        # Validate the generated ICS calendar by parsing it, repairing it if needed.
+        started = time.perf_counter()
+        try:
+            calendar, repaired = parse_calendar(ics_calendar_str)
         except ValueError:
-            print("The produced calendar event is not valid, retrying...")
-        except RateLimitError as e:
-            print(f"Rate limit error encountered: {e}, retrying...")
+            calendar, repaired = None, True
+        calendar, broken = _split_events(calendar, ics_calendar_str)
+        if broken and not salvage:
+            calendar = None
+        if calendar is None:
+            outcome = "regenerated" if attempt < max_attempts else "failed"
+        else:
+            outcome = "salvaged" if broken else "repaired" if repaired else "valid"
+        record("validation", seconds=_since(started), outcome=outcome)
+        if calendar is None:
+            if attempt < max_attempts:
+                conversion_stats.regenerated += 1
+                logger.info("The produced calendar is not valid, retrying")
+            continue
+
+        if broken:
+            conversion_stats.salvaged += 1
+            fixed, dropped = await _afix_events(
+                promptic, content, broken, language, limiter, max_attempts - attempt
+            )
+            # the excerpts may make the LLM repeat events that were valid already
+            known = {event_fingerprint(event) for event in calendar.walk("VEVENT")}
+            fixed = [event for event in fixed if event_fingerprint(event) not in known]
+            for event in fixed:
+                calendar.add_component(event)
+                if on_event is not None:
+                    on_event(event)
+            conversion_stats.events_fixed += len(fixed)
+            conversion_stats.events_dropped += dropped
+            record("event_fixes", fixed=len(fixed), dropped=dropped)
+            if dropped:
+                logger.warning("Dropped %d event(s) that could not be fixed", dropped)
+        elif repaired:
+            conversion_stats.repaired += 1
+        else:
+            conversion_stats.valid += 1
+        return calendar
+
+    conversion_stats.failed += 1
+    raise InvalidCalendarError(max_attempts, ics_calendar_str)
+
+
+async def ahedged_extract_calendar(
+    primary: "Promptic",
+    hedge: "Promptic",
+    content: str,
+    language: str | None = None,
+    limiter: AdaptiveRateLimiter | None = None,
+    on_event: EventCallback | None = None,
+    max_attempts: int = 3,
+    hedge_delay: float = 15.0,
+) -> "Component":
+    """
+    Extract the calendar of ``content`` like :func:`aextract_calendar`, hedging slow calls.
+
+    When ``primary`` has neither returned nor streamed an event within ``hedge_delay``
+    seconds, the same extraction is started with ``hedge`` as well. The first of the two
+    to produce a valid calendar wins and the other one is cancelled. Events streamed
+    after the hedge started are held back and only those of the winner are passed on.
+    """
+    hedged = False
+    streamed = asyncio.Event()
+    held: dict[str, list[Component]] = {"primary": [], "hedge": []}
+
+    def relay(name: str, on_event: EventCallback) -> EventCallback:
+        def forward(event: "Component") -> None:
+            if hedged:
+                held[name].append(event)
+            else:
+                streamed.set()
+                on_event(event)
+
+        return forward
+
+    def extract(name: str, promptic: "Promptic") -> "asyncio.Task[Component]":
+        relayed = relay(name, on_event) if on_event is not None else None
+        return asyncio.create_task(
+            aextract_calendar(promptic, content, language, limiter, relayed, max_attempts)
+        )
+
+    tasks: dict[asyncio.Task[Component], str] = {extract("primary", primary): "primary"}
+    first_event = asyncio.create_task(streamed.wait())
+    try:
+        await asyncio.wait(
+            [*tasks, first_event], timeout=hedge_delay, return_when=asyncio.FIRST_COMPLETED
+        )
+        first_event.cancel()
+        if streamed.is_set() or any(task.done() for task in tasks):
+            return await next(iter(tasks))
+
+        hedged = True
+        conversion_stats.hedged += 1
+        tasks[extract("hedge", hedge)] = "hedge"
+        while True:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            # prefer a valid calendar when both finish at once
+            for task in sorted(done, key=lambda task: task.exception() is not None):
+                name = tasks.pop(task)
+                if task.exception() is not None and tasks:
+                    continue
+                calendar = task.result()  # raises the error of the last one to fail
+                if name == "hedge":
+                    conversion_stats.hedge_wins += 1
+                record("hedge", winner=name)
+                _emit_events(held[name], on_event)
+                return calendar
+    finally:
+        first_event.cancel()
+        for task in tasks:
+            task.cancel()
+
+
+async def _acascade_extract(
+    cascade: "Sequence[tuple[str, Promptic]]",
+    extract: Callable[..., Awaitable["Component"]],
+    content: str,
+    language: str | None,
+    limiter: AdaptiveRateLimiter | None,
+    on_event: EventCallback | None,
+    max_attempts: int,
+) -> "Component":
+    """
+    Try the cheaper ``(model, promptic)`` pairs of ``cascade`` in order before ``extract``.
+
+    A cheaper model gets a single call. Its calendar is accepted unless the output is
+    invalid, has broken events or fails the sanity checks of :func:`calendar_problems`;
+    otherwise the next model is asked. Events a cheaper model streams are held back
+    until its calendar is accepted.
+    """
+    for model, promptic in cascade:
+        held: list[Component] = []
+        try:
+            calendar = await aextract_calendar(
+                promptic,
+                content,
+                language,
+                limiter,
+                held.append if on_event is not None else None,
+                max_attempts=1,
+                salvage=False,
+            )
+        except InvalidCalendarError:
+            reason = "invalid calendar"
+        else:
+            if not (problems := calendar_problems(calendar, today=_today.get())):
+                _emit_events(held, on_event)
+                return calendar
+            reason = problems[0]
+        conversion_stats.escalated += 1
+        record("escalation", model=model, reason=reason)
+        logger.info("Escalating from %s: %s", model, reason)
+    return await extract(content, language, limiter, on_event, max_attempts)
+
+
+async def aprocess_content(
+    content: str,
+    api_key: str | None,
+    model: str,
+    language: str | None = None,
+    cache: ResultCache | None = None,
+    limiter: AdaptiveRateLimiter | None = None,
+    chunk_size: int | None = 8000,
+    prefilter: bool = False,
+    fast_path: bool = True,
+    on_event: EventCallback | None = None,
+    max_attempts: int = 3,
+    on_metric: MetricCallback | None = None,
+    hedge_model: str | None = None,
+    hedge_delay: float = 15.0,
+    cascade: Sequence[str] = (),
+    today: date | None = None,
+) -> ConversionResult:
+    """
+    Process the content using the LLM and ensure the generated ICS calendar is valid.
+    Output that does not parse is repaired locally and otherwise regenerated, up to
+    ``max_attempts`` LLM calls before :class:`InvalidCalendarError` is raised; rate
+    limit errors that persist through the paced retries of
+    :func:`acall_llm_with_retry` are raised as well.
+
+    Without an ``api_key``, ``TEXT2ICS_API_KEY`` or the provider's own variable (such as
+    ``OPENAI_API_KEY``) is used, also when set in a ``.env`` file; it is only looked up
+    when the LLM is actually called.
+
+    This coroutine only awaits network I/O, so many conversions can share one event loop.
+    When a ``cache`` is given, a previously validated calendar for the same content,
+    model, language and system prompt is returned without calling the LLM. Concurrent
+    conversions of the same input share a single LLM run, see :func:`_asingle_flight`.
+
+    Content longer than ``chunk_size`` characters is split at paragraph and event line
+    boundaries, the chunks are extracted concurrently and their events merged with
+    duplicates from overlapping chunks removed. Pass ``chunk_size=None`` to always send
+    the content in one request.
+
+    With a ``hedge_model``, an extraction the LLM has not answered (or streamed an event
+    of) within ``hedge_delay`` seconds is also sent to the hedge model, and the first
+    valid calendar wins, see :func:`ahedged_extract_calendar`. The hedge uses the same
+    API key.
+
+    With a ``cascade`` of cheaper models, each extraction is tried with those first, in
+    order, and only escalated to the next model (and finally to ``model``) when the
+    output is invalid or implausible: no events, or events far from today. The cascade
+    models use the same API key.
+
+    With ``prefilter``, lines without date or time signals (and away from any) are
+    dropped locally before the content is sent, see :func:`filter_relevant`.
+
+    Dates without a year are resolved to their next occurrence after ``today``, the
+    current date by default; pass the date a message was sent to convert it as of then.
+
+    With ``fast_path`` (and no explicit ``language``), lines in the documented
+    ``24/9 - Title kl. 19-21`` format are converted locally by :func:`parse_schedule`.
+    Only the remaining lines are sent to the LLM, and not at all when none of them
+    carries a date or time.
+
+    ``on_event`` is called with every event as soon as it is known: streamed from the
+    LLM, parsed locally or read from the cache. Each distinct event is reported once,
+    even when an invalid completion has to be regenerated.
+
+    The calendar is returned as a :class:`ConversionResult`, which memoizes its ICS
+    bytes, preview events and QR code. Its ``profile`` holds the measurements of the
+    conversion (stage and LLM timings, tokens, retries, validation outcomes and cache
+    status); ``on_metric`` receives each of them as it is recorded, see
+    :mod:`text2ics.metrics`.
+    """
+    if on_event is not None:
+        on_event = _once_per_event(on_event)
+
+    profile = ConversionProfile(on_metric=on_metric)
+    token = _today.set(today)
+    try:
+        with profiling(profile):
+            calendar, serialized = await _aprocess_content(
+                content,
+                api_key,
+                model,
+                language,
+                cache,
+                limiter,
+                chunk_size,
+                prefilter,
+                fast_path,
+                on_event,
+                max_attempts,
+                hedge_model,
+                hedge_delay,
+                cascade,
+            )
+    finally:
+        _today.reset(token)
+    profile.on_metric = None  # keep the result picklable
+    return ConversionResult(calendar, profile, serialized)
+
+
+async def _aprocess_content(
+    content: str,
+    api_key: str | None,
+    model: str,
+    language: str | None,
+    cache: ResultCache | None,
+    limiter: AdaptiveRateLimiter | None,
+    chunk_size: int | None,
+    prefilter: bool,
+    fast_path: bool,
+    on_event: EventCallback | None,
+    max_attempts: int,
+    hedge_model: str | None,
+    hedge_delay: float,
+    cascade: Sequence[str],
+) -> "tuple[Component, bytes | None]":
+    started = time.perf_counter()
+    if prefilter:
+        content = filter_relevant(content).text
+        record("stage", name="prefilter", seconds=_since(started))
+
+    rule_calendar = None
+    if fast_path and language is None:
+        stage = time.perf_counter()
+        schedule = parse_schedule(content, _today.get())
+        record("stage", name="rules", seconds=_since(stage))
+        if schedule.events:
+            rule_calendar = schedule.calendar()
+            _emit_events(rule_calendar.walk("VEVENT"), on_event)
+            if not schedule.needs_llm:
+                record("cache", status="skipped")
+                record("stage", name="total", seconds=_since(started))
+                return rule_calendar, None
+            content = "\n".join(schedule.unparsed)
+
+    stage = time.perf_counter()
+    calendar, serialized = await _aconvert_with_llm(
+        content,
+        api_key,
+        model,
+        language,
+        cache,
+        limiter,
+        chunk_size,
+        on_event,
+        max_attempts,
+        hedge_model,
+        hedge_delay,
+        cascade,
+    )
+    record("stage", name="llm", seconds=_since(stage))
+    if rule_calendar is not None:
+        stage = time.perf_counter()
+        calendar = merge_calendars([rule_calendar, calendar], deduplicate=True)
+        serialized = None
+        record("stage", name="merge", seconds=_since(stage))
+    record("stage", name="total", seconds=_since(started))
+    return calendar, serialized
+
+
+async def _aconvert_with_llm(
+    content: str,
+    api_key: str | None,
+    model: str,
+    language: str | None,
+    cache: ResultCache | None,
+    limiter: AdaptiveRateLimiter | None,
+    chunk_size: int | None,
+    on_event: EventCallback | None = None,
+    max_attempts: int = 3,
+    hedge_model: str | None = None,
+    hedge_delay: float = 15.0,
+    cascade: Sequence[str] = (),
+) -> "tuple[Component, bytes]":
+    """Return the LLM calendar and its ICS bytes"""
+    # every model that may produce the calendar is part of the key
+    models = ">".join([*cascade, model]) + (f"|{hedge_model}" if hedge_model else "")
+    key = cache_key(content, models, language, _today.get())
+    if cache is not None and (cached := cache.get(key)) is not None:
+        record("cache", status="hit")
+        calendar = icalendar.Calendar.from_ical(cached.decode("utf-8"))
+        _emit_events(calendar.walk("VEVENT"), on_event)
+        return calendar, cached
+    record("cache", status="disabled" if cache is None else "miss")
+
+    async def extract_all() -> "Component":
+        promptic = get_converter(model, api_key).promptic
+        if hedge_model is None:
+            extract = functools.partial(aextract_calendar, promptic)
+        else:
+            extract = functools.partial(
+                ahedged_extract_calendar,
+                promptic,
+                get_converter(hedge_model, api_key).promptic,
+                hedge_delay=hedge_delay,
+            )
+        if cascade:
+            extract = functools.partial(
+                _acascade_extract,
+                [(cheap, get_converter(cheap, api_key).promptic) for cheap in cascade],
+                extract,
+            )
+        chunks = split_content(content, chunk_size) if chunk_size else [content]
+        if len(chunks) == 1:
+            calendar = await extract(content, language, limiter, on_event, max_attempts)
+        else:
+            calendars = await asyncio.gather(
+                *(extract(chunk, language, limiter, on_event, max_attempts) for chunk in chunks)
+            )
+            calendar = merge_calendars(calendars, deduplicate=True)
+        calendar["PRODID"] = prodid()
+        return calendar
+
+    # a run is billed to and limited by its API key, so only callers with the same key share it
+    api_key_hash = hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()
+    calendar, serialized, shared = await _asingle_flight(f"{key}:{api_key_hash}", extract_all)
+    if shared:
+        record("cache", status="coalesced")
+        conversion_stats.coalesced += 1
+        _emit_events(calendar.walk("VEVENT"), on_event)
+    elif cache is not None:
+        cache.put(key, serialized)
+    return calendar, serialized
+
+
+_flights: dict[str, concurrent.futures.Future[bytes]] = {}
+_flights_lock = threading.Lock()
+
+
+async def _asingle_flight(
+    key: str, convert: Callable[[], Awaitable["Component"]]
+) -> "tuple[Component, bytes, bool]":
+    """
+    Run ``convert`` once for all concurrent conversions with the same ``key``.
+
+    The first caller runs it; callers arriving while it is in flight, from any thread or
+    event loop, wait for its ICS bytes and get their own copy of the calendar. When the
+    conversion in flight gives no valid calendar, the waiting callers fail with the same
+    :class:`InvalidCalendarError`, as their runs would end alike. When it fails otherwise
+    or is cancelled, a waiting caller runs it itself, so an error of one caller (like a
+    bad API key or a rate limit) never spreads to the others. Returns the calendar, its
+    ICS bytes and whether they were shared.
+    """
+    while True:
+        with _flights_lock:
+            flight = _flights.get(key)
+            if leader := flight is None:
+                flight = _flights[key] = concurrent.futures.Future()
+        if leader:
+            break
+        try:
+            serialized = await asyncio.shield(asyncio.wrap_future(flight))
+        except InvalidCalendarError:
+            raise
+        except (Exception, asyncio.CancelledError):
+            if (task := asyncio.current_task()) is None or task.cancelling():
+                raise
+            continue
+        return icalendar.Calendar.from_ical(serialized.decode("utf-8")), serialized, True
+
+    try:
+        calendar = await convert()
+        serialized = calendar.to_ical()
+    except Exception as e:
+        flight.set_exception(e)
+        raise
+    else:
+        flight.set_result(serialized)
+    finally:
+        if not flight.done():  # cancelled, or interrupted by KeyboardInterrupt and the like
+            flight.cancel()
+        with _flights_lock:
+            del _flights[key]
+    return calendar, serialized, False
+
+
+def process_content(
+    content: str,
+    api_key: str | None,
+    model: str,
+    language: str | None = None,
+    cache: ResultCache | None = None,
+    limiter: AdaptiveRateLimiter | None = None,
+    chunk_size: int | None = 8000,
+    prefilter: bool = False,
+    fast_path: bool = True,
+    on_event: EventCallback | None = None,
+    max_attempts: int = 3,
+    on_metric: MetricCallback | None = None,
+    hedge_model: str | None = None,
+    hedge_delay: float = 15.0,
+    cascade: Sequence[str] = (),
+    today: date | None = None,
+) -> ConversionResult:
+    """
+    Synchronous wrapper around :func:`aprocess_content` for callers without an event loop.
+
+    The conversion runs on the background event loop of the shared :class:`Converter`
+    for ``model`` and ``api_key``, see :func:`get_converter`.
+    """
+    return get_converter(model, api_key).convert(
+        content=content,
+        language=language,
+        cache=cache,
+        limiter=limiter,
+        chunk_size=chunk_size,
+        prefilter=prefilter,
+        fast_path=fast_path,
+        on_event=on_event,
+        max_attempts=max_attempts,
+        on_metric=on_metric,
+        hedge_model=hedge_model,
+        hedge_delay=hedge_delay,
+        cascade=cascade,
+        today=today,
+    )
+
+
+# Mark the static system messages as a cacheable prefix. litellm adds the cache control
+# hints for providers that need them (Anthropic, Bedrock, ...) and leaves them out for
+# providers that cache prefixes on their own, like OpenAI.
+_CACHE_CONTROL = [{"location": "message", "role": "system"}]
+
+
+class Converter:
+    """
+    A conversion session for one model and API key.
+
+    The Promptic client is built on the first LLM call and then reused, and synchronous
+    conversions run on one long-lived background event loop. The HTTP clients litellm
+    keeps per event loop, and their keep-alive connections, therefore survive from one
+    conversion to the next instead of being torn down by a fresh ``asyncio.run``.
+    """
+
+    def __init__(self, model: str, api_key: str | None = None):
+        self.model = model
+        self.api_key = api_key
+        self._promptic: Promptic | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def promptic(self) -> "Promptic":
+        """The Promptic client of the session, imported and built on first use"""
+        with self._lock:
+            if self._promptic is None:
+                from litellm import acompletion
+                from promptic import Promptic
+
+                load_environment()
+                self._promptic = Promptic(
+                    model=self.model,
+                    api_key=self.api_key or os.environ.get("TEXT2ICS_API_KEY"),
+                    create_completion_fn=acompletion,
+                    cache_control_injection_points=_CACHE_CONTROL,
+                )
+            return self._promptic
+
+    async def aconvert(self, content: str, **kwargs: Any) -> ConversionResult:
+        """Convert ``content``; accepts the keyword arguments of :func:`aprocess_content`"""
+        return await aprocess_content(content, self.api_key, self.model, **kwargs)
+
+    def convert(self, content: str, **kwargs: Any) -> ConversionResult:
+        """Convert ``content`` on the background event loop, blocking until it is done"""
+        return run_in_background(self.aconvert(content, **kwargs))
+
+
+_converters: OrderedDict[tuple[str, str | None], Converter] = OrderedDict()
+_converters_lock = threading.Lock()
+
+
+def get_converter(model: str, api_key: str | None = None, max_sessions: int = 32) -> Converter:
+    """
+    Return the shared :class:`Converter` for ``model`` and ``api_key``.
+
+    The ``max_sessions`` most recently used sessions are kept.
+    """
+    key = (model, api_key)
+    with _converters_lock:
+        if (converter := _converters.get(key)) is None:
+            converter = _converters[key] = Converter(model, api_key)
+            while len(_converters) > max_sessions:
+                _converters.popitem(last=False)
+        _converters.move_to_end(key)
+        return converter
+
+
+_loop: asyncio.AbstractEventLoop | None = None
+_loop_lock = threading.Lock()
+
+
+def background_loop() -> asyncio.AbstractEventLoop:
+    """The event loop, running in a daemon thread, that synchronous conversions share"""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="text2ics", daemon=True).start()
+        return _loop
+
+
+def run_in_background(coroutine: Coroutine[Any, Any, T]) -> T:
+    """Run ``coroutine`` on :func:`background_loop` and wait for its result"""
+    loop = background_loop()
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        coroutine.close()
+        raise RuntimeError("Use the async API from within the text2ics event loop")
+
+    future = asyncio.run_coroutine_threadsafe(coroutine, loop)
+    try:
+        return future.result()
+    except BaseException:
+        future.cancel()
+        raise
+
+
+async def astream_events(
+    content: str, api_key: str | None, model: str, **kwargs: Any
+) -> AsyncIterator["Component"]:
+    """
+    Yield the events of ``content`` as they are produced.
+
+    Accepts the same keyword arguments as :func:`aprocess_content`.
+    """
+    events: asyncio.Queue[Component] = asyncio.Queue()
+    task = asyncio.ensure_future(
+        aprocess_content(content, api_key, model, on_event=events.put_nowait, **kwargs)
+    )
+    try:
+        while not (task.done() and events.empty()):
+            getter = asyncio.ensure_future(events.get())
+            await asyncio.wait({getter, task}, return_when=asyncio.FIRST_COMPLETED)
+            if getter.done():
+                yield getter.result()
+            else:
+                getter.cancel()
+        task.result()  # surface conversion errors
+    finally:
+        task.cancel()
+
+
+def stream_events(
+    content: str, api_key: str | None, model: str, **kwargs: Any
+) -> Iterator["Component"]:
+    """
+    Synchronous counterpart of :func:`astream_events`, converting in a background thread.
+    """
+    events: queue.Queue[Component | BaseException | None] = queue.Queue()
+
+    def run() -> None:
+        try:
+            process_content(content, api_key, model, on_event=events.put, **kwargs)
+        except BaseException as e:
+            events.put(e)
+        finally:
+            events.put(None)
+
+    threading.Thread(target=run, daemon=True).start()
+    while (item := events.get()) is not None:
+        if isinstance(item, BaseException):
+            raise item
+        yield item
+
+
+def _once_per_event(on_event: EventCallback) -> EventCallback:
+    """Wrap ``on_event`` so events already reported (by fingerprint) are skipped"""
+    seen: set[tuple[str, str]] = set()
+
+    def emit(event: "Component") -> None:
+        if (fingerprint := event_fingerprint(event)) not in seen:
+            seen.add(fingerprint)
+            on_event(event)
+
+    return emit
+
+
+def _emit_events(events: "list[Component]", on_event: EventCallback | None) -> None:
+    if on_event is not None:
+        for event in events:
+            on_event(event)
+
 
-    calendar = icalendar.Calendar.from_ical(ics_calendar_str)
-    calendar["PRODID"] = f"-//jgalabs//text2ics {version('text2ics')}//EN"
-    return calendar
+def _since(start: float) -> float:
+    return time.perf_counter() - start
@@ -0,0 +1,236 @@
+"""
+Helpers for assembling calendars out of the calendars produced by single conversions.
+"""
+
+import re
+import uuid
+from collections.abc import Iterable
+from datetime import date, datetime, timedelta
+from importlib.metadata import version
+
+import icalendar
+
+
+def prodid() -> str:
+    """
+    Return the PRODID stamped on every calendar produced by text2ics.
+    """
+    return f"-//jgalabs//text2ics {version('text2ics')}//EN"
+
+
+def new_calendar() -> icalendar.Calendar:
+    """
+    Return an empty VCALENDAR with the properties text2ics always sets.
+    """
+    calendar = icalendar.Calendar()
+    calendar.add("VERSION", "2.0")
+    calendar.add("PRODID", prodid())
+    calendar.add("CALSCALE", "GREGORIAN")
+    return calendar
+
+
+def event_problems(event: icalendar.Component) -> list[str]:
+    """
+    List what is wrong with a parsed VEVENT; an empty list means the event is usable.
+    """
+    problems = [f"{name}: {error}" for name, error in getattr(event, "errors", [])]
+    if "DTSTART" not in event:
+        problems.append("DTSTART: missing")
+    return problems
+
+
+def calendar_problems(
+    calendar: icalendar.Component,
+    today: date | None = None,
+    past: timedelta = timedelta(days=366),
+    future: timedelta = timedelta(days=5 * 366),
+) -> list[str]:
+    """
+    List reasons to distrust a calendar that is valid ICS: no events at all, or events
+    starting more than ``past`` before or ``future`` after ``today``.
+
+    >>> calendar = new_calendar()
+    >>> calendar_problems(calendar)
+    ['no events']
+    >>> event = icalendar.Event()
+    >>> event.add("SUMMARY", "Intro")
+    >>> event.add("DTSTART", date(2025, 9, 24))
+    >>> calendar.add_component(event)
+    >>> calendar_problems(calendar, today=date(2025, 9, 1))
+    []
+    >>> calendar_problems(calendar, today=date(2035, 9, 1))
+    ['Intro starts implausibly far from today (2025-09-24)']
+    """
+    events = list(calendar.walk("VEVENT"))
+    if not events:
+        return ["no events"]
+    today = today or date.today()
+    problems: list[str] = []
+    for event in events:
+        start = event.decoded("DTSTART")
+        day = start.date() if isinstance(start, datetime) else start
+        if not today - past <= day <= today + future:
+            problems.append(
+                f"{event.get('SUMMARY', 'event')} starts implausibly far from today ({day})"
+            )
+    return problems
+
+
+def event_fingerprint(event: icalendar.Component) -> tuple[str, str]:
+    """
+    Identify an event by its normalized summary and start, independent of its UID.
+    """
+    summary = " ".join(str(event.get("SUMMARY", "")).split()).casefold()
+    start = event.get("DTSTART")
+    return summary, start.to_ical().decode("utf-8") if start is not None else ""
+
+
+def merge_calendars(
+    calendars: Iterable[icalendar.Component], deduplicate: bool = False
+) -> icalendar.Calendar:
+    """
+    Merge the events of several calendars into a single VCALENDAR.
+
+    Time zone definitions are kept once per TZID; every other component is copied over.
+    With ``deduplicate``, events whose summary and start match an event already merged
+    are dropped, and events that reuse the UID of a different event get a fresh UID.
+    """
+    merged = new_calendar()
+
+    seen_timezones: set[str] = set()
+    seen_events: set[tuple[str, str]] = set()
+    seen_uids: set[str] = set()
+    for calendar in calendars:
+        for component in calendar.subcomponents:
+            if component.name == "VTIMEZONE":
+                tzid = str(component.get("TZID"))
+                if tzid in seen_timezones:
+                    continue
+                seen_timezones.add(tzid)
+            elif component.name == "VEVENT" and deduplicate:
+                fingerprint = event_fingerprint(component)
+                if fingerprint in seen_events:
+                    continue
+                seen_events.add(fingerprint)
+                if (uid := str(component.get("UID", ""))) in seen_uids or not uid:
+                    uid = f"{uuid.uuid4()}@text2ics"
+                    component["UID"] = uid
+                seen_uids.add(uid)
+            merged.add_component(component)
+    return merged
+
+
+class VEventStream:
+    """
+    Cut complete ``BEGIN:VEVENT ... END:VEVENT`` blocks out of ICS text as it streams in.
+
+    Blocks that do not parse into a usable event are kept in ``rejected`` together with
+    their problems, so they can be sent back for fixing.
+
+    >>> stream = VEventStream()
+    >>> stream.feed("BEGIN:VCALENDAR\\nBEGIN:VEVENT\\nSUMMARY:Intro\\nDTSTART:2025")
+    []
+    >>> [str(e["SUMMARY"]) for e in stream.feed("0924\\nEND:VEVENT\\nEND:VCALENDAR\\n")]
+    ['Intro']
+    """
+
+    begin = "BEGIN:VEVENT"
+    end = "END:VEVENT"
+
+    def __init__(self):
+        self._parts: list[str] = []
+        self._pending = ""
+        self.rejected: list[tuple[str, list[str]]] = []
+
+    @property
+    def text(self) -> str:
+        """Everything fed so far"""
+        return "".join(self._parts)
+
+    def feed(self, text: str) -> list[icalendar.Component]:
+        """Add streamed text and return the events completed by it"""
+        self._parts.append(text)
+        self._pending += text
+
+        events: list[icalendar.Component] = []
+        while (start := self._pending.find(self.begin)) != -1:
+            stop = self._pending.find(self.end, start)
+            if stop == -1:
+                self._pending = self._pending[start:]
+                return events
+            stop += len(self.end)
+            block = self._pending[start:stop]
+            self._pending = self._pending[stop:]
+            try:
+                event = icalendar.Event.from_ical(block)
+            except ValueError as e:
+                self.rejected.append((block, [str(e)]))
+                continue
+            if problems := event_problems(event):
+                self.rejected.append((block, problems))
+            else:
+                events.append(event)
+
+        # keep enough of the tail to recognise a BEGIN:VEVENT split across chunks
+        self._pending = self._pending[-len(self.begin) :]
+        return events
+
+
+_CODE_FENCE = re.compile(r"^\s*```[\w-]*\s*$")
+_CONTENT_LINE = re.compile(r"^[A-Za-z0-9-]+[;:]")
+
+
+def repair_ics(text: str) -> str:
+    """
+    Fix the usual ways LLM output deviates from raw ICS, without changing its content.
+
+    Removes markdown code fences, prose before ``BEGIN:VCALENDAR`` and after
+    ``END:VCALENDAR`` and blank lines; re-folds continuation lines that lost their
+    leading space; closes unterminated VEVENTs and adds missing VCALENDAR delimiters.
+    Raises ``ValueError`` when the text contains no calendar components at all.
+
+    >>> repair_ics("Sure:\\n```ics\\nBEGIN:VEVENT\\nSUMMARY:Long\\ntitle\\n\\nEND:VEVENT\\n```").splitlines()
+    ['BEGIN:VCALENDAR', 'VERSION:2.0', 'BEGIN:VEVENT', 'SUMMARY:Long', '  title', 'END:VEVENT', 'END:VCALENDAR']
+    """  # noqa: E501
+    lines = [line.rstrip() for line in text.splitlines() if not _CODE_FENCE.match(line)]
+
+    begin = next((i for i, line in enumerate(lines) if line.upper() == "BEGIN:VCALENDAR"), None)
+    if begin is None:
+        first = next((i for i, line in enumerate(lines) if line.upper().startswith("BEGIN:")), None)
+        if first is None:
+            raise ValueError("No calendar components found to repair")
+        lines = ["BEGIN:VCALENDAR", *lines[first:]]
+    else:
+        lines = lines[begin:]
+    end = next((i for i, line in enumerate(lines) if line.upper() == "END:VCALENDAR"), None)
+    if end is not None:
+        lines = lines[: end + 1]
+
+    repaired: list[str] = []
+    in_event = False
+    for line in lines:
+        if not line.strip():
+            continue
+        upper = line.upper()
+        if not _CONTENT_LINE.match(line) and not line[0].isspace() and repaired:
+            # unfolding drops the first space, the second keeps the words apart
+            repaired.append(f"  {line.strip()}")
+            continue
+        if upper == "BEGIN:VEVENT":
+            if in_event:
+                repaired.append("END:VEVENT")
+            in_event = True
+        elif upper == "END:VEVENT":
+            in_event = False
+        elif upper == "END:VCALENDAR" and in_event:
+            repaired.append("END:VEVENT")
+            in_event = False
+        repaired.append(line)
+
+    if in_event:
+        repaired.append("END:VEVENT")
+    if not any(line.upper().startswith("VERSION:") for line in repaired):
+        repaired.insert(1, "VERSION:2.0")
+    if not repaired or repaired[-1].upper() != "END:VCALENDAR":
+        repaired.append("END:VCALENDAR")
+    return "\r\n".join(repaired) + "\r\n"
@@ -0,0 +1,276 @@
+"""
+Lazy reading and conversion of mailboxes (mbox files and maildir directories).
+
+Messages are read one at a time and converted concurrently with
+:func:`text2ics.batch.map_bounded`, so memory stays flat however large the mailbox is.
+Messages without date or time signals are skipped without calling the LLM. Every
+finished message is appended to a :class:`Journal`, which lets an interrupted run
+resume where it stopped.
+"""
+
+import datetime
+import email
+import email.policy
+import email.utils
+import html
+import json
+import mailbox
+import re
+import time
+from collections.abc import AsyncIterator, Iterable, Iterator, Sequence
+from dataclasses import dataclass
+from email.message import EmailMessage
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from text2ics.batch import map_bounded
+from text2ics.cache import ResultCache
+from text2ics.relevance import filter_relevant, score_line
+
+if TYPE_CHECKING:
+    from icalendar import Component
+
+    from text2ics.metrics import ConversionProfile
+    from text2ics.ratelimit import AdaptiveRateLimiter
+
+
+@dataclass
+class MailMessage:
+    """
+    The text of one message of a mailbox.
+
+    >>> MailMessage("1", "Newsletter", body="Nothing planned").has_date_signals
+    False
+    >>> MailMessage("2", "Yoga", body="Vi ses mandag kl. 12").has_date_signals
+    True
+    >>> from text2ics.rules import parse_schedule
+    >>> message = MailMessage("3", "Hold", "Mon, 05 Oct 2026 10:00:00 +0200", "24/9 - Intro")
+    >>> parse_schedule(message.content, message.sent).events[0].day
+    datetime.date(2027, 9, 24)
+    """
+
+    key: str
+    subject: str = ""
+    date: str | None = None
+    body: str = ""
+
+    @property
+    def has_date_signals(self) -> bool:
+        """Whether the subject or body mention a date or time"""
+        return any(score_line(line) for line in [self.subject, *self.body.splitlines()])
+
+    @property
+    def content(self) -> str:
+        """
+        The text to convert: the subject and the body.
+
+        The date the message was sent is not part of the text, where it would read as an
+        event date, but the reference date of the conversion, see :attr:`sent`.
+        """
+        return f"{self.subject}\n\n{self.body}" if self.subject else self.body
+
+    @property
+    def sent(self) -> datetime.date | None:
+        """The day the message was sent, which dates without a year refer to"""
+        try:
+            return email.utils.parsedate_to_datetime(self.date).date() if self.date else None
+        except (TypeError, ValueError):  # a malformed Date header
+            return None
+
+
+@dataclass
+class MessageResult:
+    """Outcome of converting a single message"""
+
+    key: str
+    subject: str = ""
+    date: str | None = None
+    calendar: "Component | None" = None
+    error: str | None = None
+    skipped: bool = False
+    elapsed: float = 0.0
+    output: Path | None = None
+    tokens_saved: int = 0
+    profile: "ConversionProfile | None" = None
+
+    @property
+    def ok(self) -> bool:
+        return self.calendar is not None
+
+    @property
+    def event_count(self) -> int:
+        return len(self.calendar.walk("VEVENT")) if self.calendar is not None else 0
+
+    @property
+    def status(self) -> str:
+        return "skipped" if self.skipped else "ok" if self.ok else "failed"
+
+
+def _html_to_text(markup: str) -> str:
+    """
+    Reduce HTML to its text, one line per block.
+
+    >>> _html_to_text("<p>Yoga <b>mandag</b></p><p>kl.&nbsp;12</p>")
+    'Yoga mandag\\nkl.\\xa012'
+    """
+    markup = re.sub(r"(?is)<(script|style)\b.*?</\1>", "", markup)
+    markup = re.sub(r"(?i)<br\s*/?>|</(p|div|li|tr|h\d)>", "\n", markup)
+    text = html.unescape(re.sub(r"<[^>]+>", "", markup))
+    return "\n".join(line.strip() for line in text.splitlines() if line.strip())
+
+
+def message_text(message: EmailMessage) -> str:
+    """The plain text body of ``message``, or the text of its HTML body if it has none"""
+    body = message.get_body(preferencelist=("plain", "html"))
+    if body is None:
+        return ""
+    try:
+        text = body.get_content()
+    except (LookupError, UnicodeError):  # unknown or wrong charset
+        payload = body.get_payload(decode=True)
+        text = payload.decode("utf-8", errors="replace") if isinstance(payload, bytes) else ""
+    if body.get_content_subtype() == "html":
+        text = _html_to_text(text)
+    return text.strip()
+
+
+def parse_message(key: str, data: bytes) -> MailMessage:
+    message = email.message_from_bytes(data, policy=email.policy.default)
+    return MailMessage(
+        key=str(message.get("Message-ID") or key).strip(),
+        subject=str(message.get("Subject") or ""),
+        date=str(message["Date"]) if message.get("Date") else None,
+        body=message_text(message),
+    )
+
+
+def _mbox_messages(path: Path) -> Iterator[tuple[str, bytes]]:
+    """Yield the raw messages of an mbox file with their byte offsets, one at a time"""
+    with open(path, "rb") as mbox:
+        lines: list[bytes] | None = None  # anything before the first separator is not mail
+        offset = start = 0
+        for line in mbox:
+            position, offset = offset, offset + len(line)
+            if line.startswith(b"From "):
+                if lines:
+                    yield f"{path.name}:{start}", b"".join(lines)
+                lines, start = [], position
+            elif lines is not None:
+                if line.startswith(b">") and line.lstrip(b">").startswith(b"From "):
+                    line = line[1:]  # undo the escaping of "From " at the start of lines
+                lines.append(line)
+        if lines:
+            yield f"{path.name}:{start}", b"".join(lines)
+
+
+def read_messages(path: Path) -> Iterator[MailMessage]:
+    """
+    Iterate over the messages of the mbox file or maildir directory at ``path``.
+
+    Only one message is held in memory at a time.
+    """
+    if path.is_dir():
+        maildir = mailbox.Maildir(path, factory=None, create=False)
+        for key in maildir.iterkeys():
+            yield parse_message(key, maildir.get_bytes(key))
+    else:
+        for key, data in _mbox_messages(path):
+            yield parse_message(key, data)
+
+
+class Journal:
+    """
+    Append-only record, as JSON lines, of the messages an ingestion has finished.
+
+    Each line is written and flushed as soon as its message is done, so after an
+    interruption :meth:`finished` tells which messages to leave out on the next run.
+    Failed messages are not finished and are tried again.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+
+    def entries(self) -> Iterator[dict[str, Any]]:
+        if not self.path.exists():
+            return
+        with open(self.path, encoding="utf-8") as journal:
+            for line in journal:
+                try:
+                    yield json.loads(line)
+                except ValueError:  # a line cut short by the interruption
+                    continue
+
+    def finished(self) -> set[str]:
+        """The keys of the messages that were converted or skipped"""
+        return {entry["key"] for entry in self.entries() if entry["status"] != "failed"}
+
+    def record(self, result: MessageResult) -> None:
+        entry = {
+            "key": result.key,
+            "subject": result.subject,
+            "date": result.date,
+            "status": result.status,
+            "events": result.event_count,
+            "output": str(result.output) if result.output else None,
+            "error": result.error,
+        }
+        with open(self.path, "a", encoding="utf-8") as journal:
+            journal.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+
+async def convert_messages(
+    messages: Iterable[MailMessage],
+    api_key: str | None,
+    model: str,
+    language: str | None = None,
+    cache: ResultCache | None = None,
+    concurrency: int = 8,
+    prefilter: bool = False,
+    fast_path: bool = True,
+    max_attempts: int = 3,
+    limiter: "AdaptiveRateLimiter | None" = None,
+    hedge_model: str | None = None,
+    hedge_delay: float = 15.0,
+    cascade: Sequence[str] = (),
+) -> AsyncIterator[MessageResult]:
+    """
+    Convert ``messages`` concurrently, yielding results as they finish.
+
+    Messages without date or time signals are skipped. Failures are reported on the
+    result instead of aborting the ingestion.
+    """
+    from text2ics.converter import aprocess_content
+
+    async def convert(message: MailMessage) -> MessageResult:
+        start = time.perf_counter()
+        result = MessageResult(message.key, message.subject, message.date)
+        if not message.has_date_signals:
+            result.skipped = True
+            return result
+        try:
+            content = message.content
+            if prefilter:
+                filtered = filter_relevant(content)
+                content, result.tokens_saved = filtered.text, filtered.saved_tokens
+            conversion = await aprocess_content(
+                content=content,
+                api_key=api_key,
+                model=model,
+                language=language,
+                cache=cache,
+                fast_path=fast_path,
+                max_attempts=max_attempts,
+                limiter=limiter,
+                hedge_model=hedge_model,
+                hedge_delay=hedge_delay,
+                cascade=cascade,
+                today=message.sent,
+            )
+            result.calendar, result.profile = conversion.calendar, conversion.profile
+        except Exception as e:
+            result.error = str(e) or type(e).__name__
+        result.elapsed = time.perf_counter() - start
+        return result
+
+    async for result in map_bounded(convert, messages, concurrency):
+        yield result
@@ -0,0 +1,147 @@
+"""
+Per-conversion instrumentation: where the time and the tokens of a conversion go.
+
+The converter reports measurements with :func:`record`. They are collected on the
+:class:`ConversionProfile` of the conversion currently running in the calling context
+and forwarded to its ``on_metric`` hook, if any, as ``(metric, data)`` pairs:
+
+- ``stage``: ``name`` and ``seconds`` of a pipeline stage (prefilter, rules, llm, ...)
+- ``cache``: ``status`` of the result cache lookup (hit, miss or disabled), or coalesced
+  when an identical conversion in flight was shared
+- ``prompt_build``: ``seconds`` spent building the messages of an LLM call
+- ``llm_call``: ``kind``, ``seconds``, ``time_to_first_token``, ``input_tokens``,
+  ``output_tokens``, ``cached_tokens`` (input tokens read from the provider's prompt
+  cache) and ``retries`` (rate limited attempts) of an LLM call
+- ``validation``: ``seconds`` spent validating an LLM output and its ``outcome``
+  (valid, repaired, salvaged or regenerated)
+- ``event_fixes``: number of broken events ``fixed`` and ``dropped``
+- ``hedge``: the ``winner`` (primary or hedge) of an extraction sent to the hedge model
+- ``escalation``: the cascade ``model`` whose output was rejected, and the ``reason``
+"""
+
+from collections.abc import Callable, Generator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from typing import Any
+
+MetricCallback = Callable[[str, dict[str, Any]], None]
+
+
+@dataclass
+class LLMCall:
+    """One LLM request, including the attempts that were rate limited"""
+
+    kind: str
+    seconds: float
+    time_to_first_token: float | None = None
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cached_tokens: int = 0
+    retries: int = 0
+
+
+@dataclass
+class ConversionProfile:
+    """The measurements of a single conversion"""
+
+    cache: str = "disabled"
+    stages: dict[str, float] = field(default_factory=dict[str, float])
+    prompt_build: float = 0.0
+    validation: float = 0.0
+    llm_calls: list[LLMCall] = field(default_factory=list[LLMCall])
+    outcomes: dict[str, int] = field(default_factory=dict[str, int])
+    events_fixed: int = 0
+    events_dropped: int = 0
+    hedges: dict[str, int] = field(default_factory=dict[str, int])
+    escalations: list[dict[str, str]] = field(default_factory=list[dict[str, str]])
+    on_metric: MetricCallback | None = field(default=None, repr=False, compare=False)
+
+    @property
+    def input_tokens(self) -> int:
+        return sum(call.input_tokens for call in self.llm_calls)
+
+    @property
+    def output_tokens(self) -> int:
+        return sum(call.output_tokens for call in self.llm_calls)
+
+    @property
+    def cached_tokens(self) -> int:
+        return sum(call.cached_tokens for call in self.llm_calls)
+
+    @property
+    def cached_token_ratio(self) -> float:
+        """Share of the input tokens that were read from the provider's prompt cache"""
+        return self.cached_tokens / self.input_tokens if self.input_tokens else 0.0
+
+    @property
+    def retries(self) -> int:
+        return sum(call.retries for call in self.llm_calls)
+
+    @property
+    def time_to_first_token(self) -> float | None:
+        """Time to the first token of the earliest streamed LLM call"""
+        return next(
+            (c.time_to_first_token for c in self.llm_calls if c.time_to_first_token is not None),
+            None,
+        )
+
+    def record(self, metric: str, data: dict[str, Any]) -> None:
+        match metric:
+            case "stage":
+                self.stages[data["name"]] = data["seconds"]
+            case "cache":
+                self.cache = data["status"]
+            case "prompt_build":
+                self.prompt_build += data["seconds"]
+            case "llm_call":
+                self.llm_calls.append(LLMCall(**data))
+            case "validation":
+                self.validation += data["seconds"]
+                self.outcomes[data["outcome"]] = self.outcomes.get(data["outcome"], 0) + 1
+            case "event_fixes":
+                self.events_fixed += data["fixed"]
+                self.events_dropped += data["dropped"]
+            case "hedge":
+                self.hedges[data["winner"]] = self.hedges.get(data["winner"], 0) + 1
+            case "escalation":
+                self.escalations.append(data)
+            case _:
+                pass
+        if self.on_metric is not None:
+            self.on_metric(metric, data)
+
+    def to_dict(self) -> dict[str, Any]:
+        """The profile as JSON serializable data, including the totals"""
+        profile = asdict(self)
+        del profile["on_metric"]
+        profile["totals"] = {
+            "llm_calls": len(self.llm_calls),
+            "llm_seconds": sum(call.seconds for call in self.llm_calls),
+            "time_to_first_token": self.time_to_first_token,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "cached_tokens": self.cached_tokens,
+            "cached_token_ratio": self.cached_token_ratio,
+            "retries": self.retries,
+        }
+        return profile
+
+
+_current: ContextVar[ConversionProfile | None] = ContextVar("text2ics_profile", default=None)
+
+
+@contextmanager
+def profiling(profile: ConversionProfile) -> Generator[ConversionProfile]:
+    """Collect the measurements recorded in this context (and tasks it starts) on ``profile``"""
+    token = _current.set(profile)
+    try:
+        yield profile
+    finally:
+        _current.reset(token)
+
+
+def record(metric: str, **data: Any) -> None:
+    """Report a measurement to the profile of the running conversion, if any"""
+    if (profile := _current.get()) is not None:
+        profile.record(metric, data)
@@ -0,0 +1,255 @@
+"""
+Process-wide pacing of LLM requests.
+
+A single :class:`AdaptiveRateLimiter` is shared by every conversion in the process. It
+combines a token bucket (requests per second) with an AIMD concurrency window: each
+success grows the window and the rate additively, each rate limit error halves them and
+pauses all callers for as long as the provider asked via its Retry-After headers.
+"""
+
+import asyncio
+import re
+import threading
+import time
+from collections.abc import AsyncGenerator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def parse_duration(value: str) -> float | None:
+    """
+    Parse the reset durations used in provider rate limit headers into seconds.
+
+    >>> parse_duration("20")
+    20.0
+    >>> parse_duration("6m0s")
+    360.0
+    >>> parse_duration("250ms")
+    0.25
+    >>> parse_duration("soon") is None
+    True
+    """
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+
+    parts = _DURATION_PART.findall(value)
+    if not parts or "".join(f"{n}{unit}" for n, unit in parts) != value:
+        return None
+    return sum(float(n) * _DURATION_UNITS[unit] for n, unit in parts)
+
+
+def _parse_reset(value: str, now: datetime) -> float | None:
+    """Parse a delay given either as a duration or as an absolute (HTTP or ISO) date"""
+    if (seconds := parse_duration(value)) is not None:
+        return seconds
+    for parse in (parsedate_to_datetime, datetime.fromisoformat):
+        try:
+            moment = parse(value)
+        except (TypeError, ValueError):
+            continue
+        if moment.tzinfo is None:
+            moment = moment.replace(tzinfo=timezone.utc)
+        return max((moment - now).total_seconds(), 0.0)
+    return None
+
+
+def retry_after_seconds(error: BaseException) -> float | None:
+    """
+    Read how long the provider asked us to back off from a rate limit error.
+
+    Looks at ``retry-after-ms``, ``retry-after`` and the OpenAI/Anthropic reset headers on
+    both the error itself and its HTTP response.
+    """
+    headers: dict[str, str] = {}
+    response = getattr(error, "response", None)
+    for source in (getattr(response, "headers", None), getattr(error, "headers", None)):
+        if source:
+            headers.update({str(k).lower(): str(v) for k, v in source.items()})
+
+    if "retry-after-ms" in headers:
+        try:
+            return float(headers["retry-after-ms"]) / 1000
+        except ValueError:
+            pass
+
+    now = datetime.now(timezone.utc)
+    for name in (
+        "retry-after",
+        "x-ratelimit-reset-requests",
+        "x-ratelimit-reset-tokens",
+        "anthropic-ratelimit-requests-reset",
+        "anthropic-ratelimit-tokens-reset",
+    ):
+        if name in headers and (seconds := _parse_reset(headers[name], now)) is not None:
+            return seconds
+    return None
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """Whether ``error`` is an HTTP 429 from the provider"""
+    return getattr(error, "status_code", None) == 429
+
+
+@dataclass
+class LimiterStats:
+    """Snapshot of the limiter state"""
+
+    rate: float
+    concurrency_limit: int
+    in_flight: int
+    queue_depth: int
+    paused_for: float
+    rate_limited: int
+
+
+class AdaptiveRateLimiter:
+    """
+    Token bucket plus AIMD concurrency window shared by all in-flight conversions.
+
+    The limiter is safe to use from several threads and event loops at once, which is
+    what happens when the synchronous API is called from worker threads.
+    """
+
+    def __init__(
+        self,
+        rate: float = 10.0,
+        burst: int = 20,
+        concurrency: int = 16,
+        min_rate: float = 0.1,
+        max_rate: float = 100.0,
+        max_concurrency: int = 128,
+        backoff: float = 1.0,
+    ):
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.max_concurrency = max_concurrency
+        self.backoff = backoff
+        self._window = float(concurrency)
+        self._tokens = float(burst)
+        self._refilled = time.monotonic()
+        self._paused_until = 0.0
+        self._in_flight = 0
+        self._queued = 0
+        self._rate_limited = 0
+        self._consecutive_limits = 0
+        self._waiters: list[asyncio.Future[None]] = []
+        self._lock = threading.Lock()
+
+    @property
+    def concurrency_limit(self) -> int:
+        return max(1, int(self._window))
+
+    @property
+    def stats(self) -> LimiterStats:
+        with self._lock:
+            return LimiterStats(
+                rate=self.rate,
+                concurrency_limit=self.concurrency_limit,
+                in_flight=self._in_flight,
+                queue_depth=self._queued,
+                paused_for=max(self._paused_until - time.monotonic(), 0.0),
+                rate_limited=self._rate_limited,
+            )
+
+    async def acquire(self) -> None:
+        """
+        Wait until the pause is over, a concurrency slot is free and a token is available.
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self._queued += 1
+        try:
+            while True:
+                with self._lock:
+                    delay = self._try_acquire(time.monotonic())
+                    if delay == 0:
+                        return
+                    waiter = loop.create_future()
+                    self._waiters.append(waiter)
+                try:
+                    await asyncio.wait_for(waiter, delay)
+                except TimeoutError:
+                    pass
+                finally:
+                    with self._lock:
+                        if waiter in self._waiters:
+                            self._waiters.remove(waiter)
+        finally:
+            with self._lock:
+                self._queued -= 1
+
+    def release(self, error: BaseException | None = None) -> None:
+        """
+        Give back a slot, adapting rate and concurrency to how the request went.
+        """
+        with self._lock:
+            self._in_flight -= 1
+            if error is None:
+                self._consecutive_limits = 0
+                self._window = min(self._window + 1 / self._window, self.max_concurrency)
+                self.rate = min(self.rate + 1 / self.rate, self.max_rate)
+            elif is_rate_limit_error(error):
+                self._rate_limited += 1
+                self._consecutive_limits += 1
+                self._window = max(self._window / 2, 1.0)
+                self.rate = max(self.rate / 2, self.min_rate)
+                self._tokens = min(self._tokens, 0.0)
+                pause = retry_after_seconds(error)
+                if pause is None:
+                    pause = self.backoff * 2 ** min(self._consecutive_limits - 1, 5)
+                self._paused_until = max(self._paused_until, time.monotonic() + pause)
+            self._wake()
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncGenerator[None]:
+        """Hold a request slot for the duration of the block"""
+        await self.acquire()
+        try:
+            yield
+        except BaseException as e:
+            self.release(e)
+            raise
+        else:
+            self.release()
+
+    def _try_acquire(self, now: float) -> float | None:
+        """Take a slot and return 0, or return how long to wait (None: until woken)"""
+        if now < self._paused_until:
+            return self._paused_until - now
+        if self._in_flight >= self.concurrency_limit:
+            return None
+
+        self._tokens = min(self._tokens + (now - self._refilled) * self.rate, self.burst)
+        self._refilled = now
+        if self._tokens < 1:
+            return (1 - self._tokens) / self.rate
+
+        self._tokens -= 1
+        self._in_flight += 1
+        return 0
+
+    def _wake(self) -> None:
+        for waiter in self._waiters:
+            try:
+                waiter.get_loop().call_soon_threadsafe(_resolve, waiter)
+            except RuntimeError:  # the waiter's event loop has already been closed
+                pass
+
+
+def _resolve(waiter: "asyncio.Future[Any]") -> None:
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+default_limiter = AdaptiveRateLimiter()
@@ -0,0 +1,132 @@
+"""
+Local relevance filter that drops boilerplate before the text is sent to the LLM.
+
+Lines are scored for date and time signals (dates like 24/9 or 24-09-2025, ``kl.``
+times, time ranges, weekday and month names). Only the lines with signals, plus a few
+lines of context around them, are kept; omitted runs are replaced by a marker line.
+"""
+
+import math
+import re
+from dataclasses import dataclass
+
+OMITTED = "[...]"
+
+_WEEKDAYS = (
+    "mandag|tirsdag|onsdag|torsdag|fredag|lørdag|søndag|"
+    "monday|tuesday|wednesday|thursday|friday|saturday|sunday"
+)
+# Abbreviations like "man" or "sat" are ordinary words too, so they only count with a dot
+_WEEKDAY_ABBREVIATIONS = "man|tirs|ons|tors|fre|lør|søn|mon|tue|wed|thu|fri|sat|sun"
+_MONTHS = (
+    "januar|februar|marts|april|maj|juni|juli|august|september|oktober|november|december|"
+    "january|february|march|may|june|july|october|"
+    "jan|feb|mar|apr|jun|jul|aug|sep|sept|okt|oct|nov|dec"
+)
+
+DATE_SIGNALS = [
+    # 24/9, 24.09, 24-09-2025, 24/9/25
+    re.compile(r"\b\d{1,2}[./-]\d{1,2}(?:[./-]\d{2,4})?\b"),
+    # 2025-09-24
+    re.compile(r"\b\d{4}-\d{2}-\d{2}\b"),
+    # kl. 19, kl 19.30
+    re.compile(r"\bkl\.?\s*\d{1,2}", re.IGNORECASE),
+    # 19:00, 19.30-21.00, 19–21
+    re.compile(r"\b\d{1,2}[:.]\d{2}\b"),
+    re.compile(r"\b\d{1,2}(?:[:.]\d{2})?\s*[-–—]\s*\d{1,2}(?:[:.]\d{2})?\b"),
+    re.compile(rf"\b(?:{_WEEKDAYS})\b", re.IGNORECASE),
+    re.compile(rf"\b(?:{_WEEKDAY_ABBREVIATIONS})\.", re.IGNORECASE),
+    re.compile(rf"\b\d{{1,2}}\.?\s*(?:{_MONTHS})\b", re.IGNORECASE),
+]
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Roughly estimate the number of prompt tokens of ``text`` (about four characters each).
+
+    >>> estimate_tokens("")
+    0
+    >>> estimate_tokens("24/9 - Intro")
+    3
+    """
+    return math.ceil(len(text) / 4)
+
+
+def score_line(line: str) -> int:
+    """
+    Count the date and time signals on a line.
+
+    >>> score_line("Afgang 24/09 kl. 10:30")
+    3
+    >>> score_line("Husk at medbringe billet")
+    0
+    """
+    return sum(len(pattern.findall(line)) for pattern in DATE_SIGNALS)
+
+
+@dataclass
+class FilterResult:
+    """The filtered text together with a report of what was dropped"""
+
+    text: str
+    input_tokens: int
+    kept_tokens: int
+    kept_lines: int
+    total_lines: int
+
+    @property
+    def saved_tokens(self) -> int:
+        return self.input_tokens - self.kept_tokens
+
+    @property
+    def saved_ratio(self) -> float:
+        return self.saved_tokens / self.input_tokens if self.input_tokens else 0.0
+
+    def report(self) -> str:
+        return (
+            f"Prefilter kept {self.kept_lines}/{self.total_lines} lines, "
+            f"~{self.kept_tokens}/{self.input_tokens} tokens "
+            f"(saved ~{self.saved_tokens}, {self.saved_ratio:.0%})"
+        )
+
+
+def filter_relevant(content: str, context: int = 2) -> FilterResult:
+    """
+    Keep the lines with date or time signals and ``context`` lines around each of them.
+
+    The first non-empty line (usually a subject or title) is always kept. When no line
+    has a signal the content is returned unchanged, so the LLM still gets to decide.
+
+    >>> text = "Booking\\n\\nSafety rules\\nNo pets\\nNo smoking\\nDeparture 24/9 kl. 10\\nBye"
+    >>> print(filter_relevant(text, context=1).text)
+    Booking
+    [...]
+    No smoking
+    Departure 24/9 kl. 10
+    Bye
+    """
+    lines = content.splitlines()
+    keep = [False] * len(lines)
+    for i, line in enumerate(lines):
+        if score_line(line):
+            for j in range(max(i - context, 0), min(i + context + 1, len(lines))):
+                keep[j] = True
+
+    input_tokens = estimate_tokens(content)
+    if not any(keep):
+        return FilterResult(content, input_tokens, input_tokens, len(lines), len(lines))
+
+    first = next((i for i, line in enumerate(lines) if line.strip()), 0)
+    keep[first] = True
+
+    kept: list[str] = []
+    for line, wanted in zip(lines, keep):
+        if wanted:
+            kept.append(line)
+        elif kept and kept[-1] != OMITTED:
+            kept.append(OMITTED)
+    if kept and kept[-1] == OMITTED:
+        kept.pop()
+
+    text = "\n".join(kept)
+    return FilterResult(text, input_tokens, estimate_tokens(text), sum(keep), len(lines))
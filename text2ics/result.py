@@ -0,0 +1,265 @@
+"""
+The outcome of a conversion: the parsed calendar plus memoized views of it.
+"""
+
+import bisect
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from functools import cached_property
+from typing import Any
+
+import icalendar
+
+from text2ics.metrics import ConversionProfile
+
+
+def fullcalendar_event(component: icalendar.Component) -> dict[str, Any]:
+    """
+    Convert a VEVENT into an event dictionary in the FullCalendar format used by
+    streamlit-calendar.
+    """
+    event: dict[str, Any] = {}
+    # Title
+    if "SUMMARY" in component:
+        event["title"] = str(component.get("SUMMARY"))
+
+    # Start and End Times
+    start_dt = component.get("DTSTART")
+    end_dt = component.get("DTEND")
+
+    if start_dt:
+        # Handle different types of datetime objects from icalendar
+        if isinstance(start_dt.dt, datetime):
+            event["start"] = start_dt.dt.isoformat()
+            # FullCalendar's end is exclusive. If the icalendar event is all-day
+            # and ends on a specific day, FullCalendar expects the end
+            # to be the *next* day at midnight.
+            if end_dt and isinstance(end_dt.dt, date) and not isinstance(end_dt.dt, datetime):
+                event["end"] = (end_dt.dt + timedelta(days=1)).isoformat()
+            elif end_dt:
+                event["end"] = end_dt.dt.isoformat()
+        elif isinstance(start_dt.dt, date):
+            event["start"] = start_dt.dt.isoformat()
+            event["allDay"] = True
+            if end_dt and isinstance(end_dt.dt, date):
+                # For all-day events, FullCalendar end is exclusive of the end day.
+                # So, if an all-day event ends on 2023-08-01, FullCalendar needs 2023-08-02.
+                event["end"] = (end_dt.dt + timedelta(days=1)).isoformat()
+            else:
+                # If no end date for all-day, FullCalendar expects start date + 1 day
+                event["end"] = (start_dt.dt + timedelta(days=1)).isoformat()
+
+    # Optional properties
+    if "UID" in component:
+        event["id"] = str(component.get("UID"))
+    if "LOCATION" in component:
+        event["extendedProps"] = {"location": str(component.get("LOCATION"))}
+    if "DESCRIPTION" in component:
+        if "extendedProps" not in event:
+            event["extendedProps"] = {}
+        event["extendedProps"]["description"] = str(component.get("DESCRIPTION"))
+    if "URL" in component:
+        event["url"] = str(component.get("URL"))
+    return event
+
+
+_COLUMNS = ("end", "title", "id", "location", "description", "url")
+
+
+@dataclass
+class CalendarPreview:
+    """
+    The events of a calendar in the format of :func:`fullcalendar_event`, stored as
+    columns sorted by start, so the events of one month are found by bisection and only
+    those are built into dictionaries.
+
+    >>> calendar = icalendar.Calendar.from_ical(
+    ...     "BEGIN:VCALENDAR\\r\\n"
+    ...     "BEGIN:VEVENT\\r\\nSUMMARY:Exam\\r\\nDTSTART;VALUE=DATE:20251003\\r\\nEND:VEVENT\\r\\n"
+    ...     "BEGIN:VEVENT\\r\\nSUMMARY:Camp\\r\\nDTSTART;VALUE=DATE:20250929\\r\\n"
+    ...     "DTEND;VALUE=DATE:20251001\\r\\nEND:VEVENT\\r\\n"
+    ...     "BEGIN:VEVENT\\r\\nSUMMARY:Trip\\r\\nDTSTART:20251128T090000\\r\\n"
+    ...     "DTEND:20251202T170000\\r\\nEND:VEVENT\\r\\n"
+    ...     "END:VCALENDAR\\r\\n"
+    ... )
+    >>> preview = CalendarPreview.from_events(calendar.walk("VEVENT"))
+    >>> preview.months, len(preview)
+    (['2025-09', '2025-10', '2025-11', '2025-12'], 3)
+    >>> [event["title"] for event in preview.month("2025-12")]
+    ['Trip']
+    >>> [event["title"] for event in preview.month("2025-10")]
+    ['Camp', 'Exam']
+    >>> preview.month("2025-10")[1]
+    {'start': '2025-10-03', 'allDay': True, 'end': '2025-10-04', 'title': 'Exam'}
+    """
+
+    starts: list[str] = field(default_factory=list[str])
+    last_days: list[str] = field(default_factory=list[str])
+    all_day: list[bool] = field(default_factory=list[bool])
+    columns: dict[str, list[str | None]] = field(
+        default_factory=lambda: {name: [] for name in _COLUMNS}
+    )
+    span: int = 0  # days covered by the longest event
+
+    @classmethod
+    def from_events(cls, events: list[icalendar.Component]) -> "CalendarPreview":
+        rows = [event for event in map(fullcalendar_event, events) if "start" in event]
+        rows.sort(key=lambda event: event["start"])
+        preview = cls()
+        for event in rows:
+            preview.starts.append(event["start"])
+            last_day = _last_day(event["start"], event.get("end"))
+            preview.last_days.append(last_day.isoformat())
+            preview.span = max(preview.span, (last_day - _day(event["start"])).days)
+            preview.all_day.append(event.get("allDay", False))
+            props = event.get("extendedProps", {})
+            for name in _COLUMNS:
+                preview.columns[name].append(props.get(name, event.get(name)))
+        return preview
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    @cached_property
+    def months(self) -> list[str]:
+        """The months (``YYYY-MM``) in which events take place, in order"""
+        months: set[str] = set()
+        for start, last_day in zip(self.starts, self.last_days):
+            year, month = int(start[:4]), int(start[5:7])
+            while (month_key := f"{year:04d}-{month:02d}") <= last_day[:7]:
+                months.add(month_key)
+                year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+        return sorted(months)
+
+    def window(self, first: date, last: date) -> list[dict[str, Any]]:
+        """The events that take place between the dates ``first`` and ``last`` (exclusive)"""
+        # events that started before ``first`` may still run into the window
+        lower = bisect.bisect_left(self.starts, (first - timedelta(days=self.span)).isoformat())
+        upper = bisect.bisect_left(self.starts, last.isoformat())
+        return [
+            self._event(i) for i in range(lower, upper) if self.last_days[i] >= first.isoformat()
+        ]
+
+    def month(self, month: str) -> list[dict[str, Any]]:
+        """The events that take place in ``month`` (``YYYY-MM``)"""
+        first = date.fromisoformat(f"{month}-01")
+        return self.window(first, (first + timedelta(days=31)).replace(day=1))
+
+    def _event(self, i: int) -> dict[str, Any]:
+        event: dict[str, Any] = {"start": self.starts[i]}
+        if self.all_day[i]:
+            event["allDay"] = True
+        props: dict[str, str] = {}
+        for name in _COLUMNS:
+            if (value := self.columns[name][i]) is None:
+                continue
+            if name in ("location", "description"):
+                props[name] = value
+            else:
+                event[name] = value
+        if props:
+            event["extendedProps"] = props
+        return event
+
+
+def _day(value: str) -> date:
+    return date.fromisoformat(value[:10])
+
+
+def _last_day(start: str, end: str | None) -> date:
+    """The last day an event with these FullCalendar ``start`` and ``end`` takes place"""
+    if not end:
+        return _day(start)
+    last = _day(end)
+    if len(end) == 10 or end[11:19] == "00:00:00":  # the end is exclusive
+        last -= timedelta(days=1)
+    return max(last, _day(start))
+
+
+_previews: OrderedDict[str, CalendarPreview] = OrderedDict()
+_previews_lock = threading.Lock()
+
+
+def calendar_preview(
+    ics: bytes, calendar: icalendar.Component, max_previews: int = 16
+) -> CalendarPreview:
+    """
+    Return the :class:`CalendarPreview` of ``calendar``, memoized by the hash of
+    ``ics``, its serialization.
+
+    The ``max_previews`` most recently used previews are kept.
+    """
+    key = hashlib.sha256(ics).hexdigest()
+    with _previews_lock:
+        if (preview := _previews.get(key)) is None:
+            preview = _previews[key] = CalendarPreview.from_events(calendar.walk("VEVENT"))
+            while len(_previews) > max_previews:
+                _previews.popitem(last=False)
+        _previews.move_to_end(key)
+        return preview
+
+
+@dataclass
+class ConversionResult:
+    """
+    A converted calendar whose serializations are computed once, on first use.
+
+    The calendar must not be modified after the first serialization has been read.
+    ``profile`` holds the measurements taken during the conversion. ``serialized`` may
+    carry ICS bytes of the calendar that are already known, e.g. read from the cache.
+    """
+
+    calendar: icalendar.Component
+    profile: ConversionProfile = field(default_factory=ConversionProfile)
+    serialized: bytes | None = field(default=None, repr=False)
+
+    @property
+    def timings(self) -> dict[str, float]:
+        """Seconds spent in each conversion stage"""
+        return self.profile.stages
+
+    @property
+    def cached(self) -> bool:
+        """Whether the LLM result came from the result cache"""
+        return self.profile.cache == "hit"
+
+    @cached_property
+    def ics(self) -> bytes:
+        """The calendar serialized as ICS"""
+        if self.serialized is not None:
+            return self.serialized
+        return self.calendar.to_ical()
+
+    def to_ical(self) -> bytes:
+        return self.ics
+
+    @cached_property
+    def events(self) -> list[icalendar.Component]:
+        return list(self.calendar.walk("VEVENT"))
+
+    @property
+    def event_count(self) -> int:
+        return len(self.events)
+
+    @cached_property
+    def preview(self) -> CalendarPreview:
+        """The events prepared for the calendar preview, shared by equal calendars"""
+        return calendar_preview(self.ics, self.calendar)
+
+    @cached_property
+    def qr_png(self) -> bytes | None:
+        """A PNG QR code holding the ICS data, or None when it is too large for one"""
+        import qrcode
+        from qrcode.exceptions import DataOverflowError
+
+        try:
+            image = qrcode.make(self.ics)
+        except (DataOverflowError, ValueError):  # beyond the ~3 KB of the largest version
+            return None
+        with io.BytesIO() as image_stream:
+            image.save(image_stream)  # qrcode images save as PNG
+            return image_stream.getvalue()
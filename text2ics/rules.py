@@ -0,0 +1,193 @@
+"""
+Deterministic parser for inputs written in the line format of the system prompt.
+
+Lines like ``24/9 - Session 1: Intro kl. 19-21`` are turned into events locally,
+following the same NORMALIZATION rules the LLM is given: Europe/Copenhagen local
+times, next occurrence when the year is missing, all-day DATE events when there is no
+time and a one hour DURATION when only a start time is given.
+"""
+
+import re
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+import icalendar
+
+from text2ics.ics import new_calendar
+from text2ics.relevance import score_line
+
+TIMEZONE = ZoneInfo("Europe/Copenhagen")
+
+EVENT_LINE = re.compile(
+    r"^\s*(?P<day>\d{1,2})\s*(?P<separator>[./])\s*(?P<month>\d{1,2})(?:[./](?P<year>\d{2}|\d{4}))?\.?"
+    r"\s*[-–—]\s*(?P<rest>\S.*?)\s*$"
+)
+_CLOCK = r"\d{1,2}(?:[:.]\d{2})?"
+TIME_RANGE = re.compile(
+    rf"(?:,\s*)?(?:\bkl\.?\s*(?P<start>{_CLOCK})(?:\s*[-–—]\s*(?P<end>{_CLOCK}))?"
+    r"|(?P<start2>\d{1,2}[:.]\d{2})\s*[-–—]\s*(?P<end2>\d{1,2}[:.]\d{2}))",
+    re.IGNORECASE,
+)
+# A title starting with a number is more likely a time, a second date or a range
+# ("8.05 - 9.00 Ankomst", "24/9 - 26/9 - Konference", "1.5 - 2 timers gåtur") than
+# part of the title, so such lines are left to the LLM
+_AMBIGUOUS_TITLE = re.compile(r"^\d")
+
+
+@dataclass
+class ParsedLine:
+    """An event read from a single input line"""
+
+    summary: str
+    day: date
+    start: time | None = None
+    end: time | None = None
+
+    def to_event(self, stamp: datetime) -> icalendar.Event:
+        event = icalendar.Event()
+        event.add("UID", f"{self.day:%Y%m%d}-{_slug(self.summary)}@text2ics")
+        event.add("DTSTAMP", stamp)
+        event.add("SUMMARY", self.summary)
+        if self.start is None:
+            event.add("DTSTART", self.day)
+            event.add("DTEND", self.day + timedelta(days=1))
+            return event
+
+        start = datetime.combine(self.day, self.start, tzinfo=TIMEZONE)
+        event.add("DTSTART", start)
+        if self.end is None:
+            event.add("DURATION", timedelta(hours=1))
+        else:
+            end = datetime.combine(self.day, self.end, tzinfo=TIMEZONE)
+            if end <= start:  # runs past midnight
+                end += timedelta(days=1)
+            event.add("DTEND", end)
+        return event
+
+
+@dataclass
+class ScheduleParse:
+    """Events parsed from the input plus the lines the rules could not handle"""
+
+    events: list[ParsedLine] = field(default_factory=list[ParsedLine])
+    unparsed: list[str] = field(default_factory=list[str])
+
+    @property
+    def needs_llm(self) -> bool:
+        """Whether any unparsed line still looks like it describes an event"""
+        return any(score_line(line) for line in self.unparsed)
+
+    def calendar(self) -> icalendar.Calendar:
+        calendar = new_calendar()
+        calendar.add("X-WR-TIMEZONE", "Europe/Copenhagen")
+        stamp = datetime.now(timezone.utc).replace(microsecond=0)
+        for parsed in self.events:
+            calendar.add_component(parsed.to_event(stamp))
+        if years := [parsed.day.year for parsed in self.events if parsed.start is not None]:
+            # define Europe/Copenhagen for the years of the events, as merged LLM events may
+            # use the same TZID
+            calendar.add_missing_timezones(date(min(years), 1, 1), date(max(years) + 2, 1, 1))
+        return calendar
+
+
+def _slug(text: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", text.casefold()).strip("-")[:40] or "event"
+
+
+def _clock(value: str) -> time:
+    hour, _, minute = value.replace(".", ":").partition(":")
+    return time(int(hour), int(minute or 0))
+
+
+def _reads_as_clock(match: re.Match[str]) -> bool:
+    """Whether a dotted date could just as well be an ``H.MM`` time, like ``12.05``"""
+    return (
+        match["separator"] == "."
+        and match["year"] is None
+        and int(match["day"]) < 24
+        and len(match["month"]) == 2
+    )
+
+
+def _resolve_date(day: int, month: int, year: str | None, today: date) -> date:
+    if year is not None:
+        return date(int(year) + (2000 if len(year) == 2 else 0), month, day)
+    candidate = date(today.year, month, day)
+    return candidate if candidate >= today else date(today.year + 1, month, day)
+
+
+def parse_line(line: str, today: date | None = None) -> ParsedLine | None:
+    """
+    Parse one ``<date> <separator> <title> [times]`` line, or return None.
+
+    >>> parse_line("24/9 - Session 1: Intro kl. 19-21", today=date(2025, 9, 1))
+    ParsedLine(summary='Session 1: Intro', day=datetime.date(2025, 9, 24), start=datetime.time(19, 0), end=datetime.time(21, 0))
+    >>> parse_line("3.1 – Nytårskur", today=date(2025, 9, 1)).day
+    datetime.date(2026, 1, 3)
+    >>> parse_line("Husk madpakke") is None
+    True
+
+    Lines whose title starts with a time, a date or a number are not parsed, nor are
+    dotted dates that read as a time just as well:
+
+    >>> parse_line("8.05 - 9.00 Ankomst og kaffe") is None
+    True
+    >>> parse_line("12.05 - Frokost") is None
+    True
+    >>> parse_line("24/9 - 26/9 - Konference") is None
+    True
+    >>> parse_line("1.5 - 2 timers gåtur") is None
+    True
+    """  # noqa: E501
+    match = EVENT_LINE.match(line)
+    if match is None or _AMBIGUOUS_TITLE.match(match["rest"]) or _reads_as_clock(match):
+        return None
+
+    today = today or datetime.now(TIMEZONE).date()
+    try:
+        day = _resolve_date(int(match["day"]), int(match["month"]), match["year"], today)
+    except ValueError:  # not a real date, e.g. 31/2
+        return None
+
+    rest = match["rest"]
+    start = end = None
+    if times := TIME_RANGE.search(rest):
+        try:
+            start = _clock(times["start"] or times["start2"])
+            end_text = times["end"] or times["end2"]
+            end = _clock(end_text) if end_text else None
+        except ValueError:  # not a real time, e.g. kl. 25
+            return None
+        rest = (rest[: times.start()] + rest[times.end() :]).strip()
+
+    summary = rest.strip(" ,;:-–—")
+    if not summary:
+        return None
+    return ParsedLine(summary=summary, day=day, start=start, end=end)
+
+
+def parse_schedule(content: str, today: date | None = None) -> ScheduleParse:
+    """
+    Parse every line of ``content`` that follows the documented event line format.
+
+    Nothing is parsed when a line may start with a time instead of a date, as in an
+    agenda under a dated heading: the LLM then gets every line, heading included.
+
+    >>> parsed = parse_schedule("Program\\n8.05 - 9.00 Ankomst\\n9.10 - 10.00 Velkomst")
+    >>> parsed.events, parsed.needs_llm
+    ([], True)
+    >>> parse_schedule("Program 24/9\\n12.05 - Frokost\\n3.1 - Nytårskur").events
+    []
+    """
+    lines = [line for line in content.splitlines() if line.strip()]
+    if any((match := EVENT_LINE.match(line)) and _reads_as_clock(match) for line in lines):
+        return ScheduleParse(unparsed=lines)
+
+    result = ScheduleParse()
+    for line in lines:
+        if (parsed := parse_line(line, today)) is not None:
+            result.events.append(parsed)
+        else:
+            result.unparsed.append(line)
+    return result
@@ -0,0 +1,316 @@
+"""
+A long-running conversion service on a local HTTP or Unix socket endpoint.
+
+The server keeps the converter (and the LLM client libraries) loaded, so a conversion
+costs a request on an open connection instead of a new process. Endpoints:
+
+- ``POST /convert``: convert the request body. The body is either the plain text or a
+  JSON object ``{"text": ..., "model": ..., "language": ...}``; ``model`` and
+  ``language`` may also be given as query parameters. The response is the ICS file, or
+  with ``Accept: application/json`` an object with the ICS, event count and profile.
+- ``GET /health``: liveness check.
+- ``GET /metrics``: queue, throughput, latency, rate limiter and cache counters as JSON.
+
+Requests are served by ``concurrency`` workers, and up to ``queue_size`` more wait in a
+queue; beyond that the server answers 503 right away, so callers can back off instead of
+piling up.
+"""
+
+import asyncio
+import importlib
+import json
+import time
+from collections import deque
+from collections.abc import Sequence
+from dataclasses import asdict, dataclass, field
+from http import HTTPStatus
+from typing import TYPE_CHECKING, Any
+from urllib.parse import parse_qs, urlsplit
+
+from text2ics.cache import ResultCache
+from text2ics.ratelimit import default_limiter
+
+if TYPE_CHECKING:
+    from text2ics.result import ConversionResult
+
+
+@dataclass
+class ServerStats:
+    """Counters of the requests handled by a server"""
+
+    received: int = 0
+    completed: int = 0
+    failed: int = 0
+    rejected: int = 0
+    bad_requests: int = 0
+    latencies: deque[float] = field(default_factory=lambda: deque(maxlen=1000))
+
+    def latency_percentiles(self) -> dict[str, float]:
+        ordered = sorted(self.latencies)
+        if not ordered:
+            return {}
+        return {
+            f"p{q}": ordered[min(len(ordered) - 1, len(ordered) * q // 100)] for q in (50, 95, 99)
+        }
+
+
+@dataclass
+class Response:
+    status: HTTPStatus
+    body: bytes = b""
+    content_type: str = "application/json"
+    headers: dict[str, str] = field(default_factory=dict[str, str])
+
+    @classmethod
+    def json(cls, data: Any, status: HTTPStatus = HTTPStatus.OK, **headers: str) -> "Response":
+        return cls(status, json.dumps(data).encode("utf-8"), headers=headers)
+
+    @classmethod
+    def error(cls, status: HTTPStatus, message: str, **headers: str) -> "Response":
+        return cls.json({"error": message}, status, **headers)
+
+
+@dataclass
+class _Job:
+    content: str
+    model: str
+    language: str | None
+    future: "asyncio.Future[ConversionResult]"
+
+
+class ConversionServer:
+    """
+    Serve conversions over HTTP/1.1 with keep-alive, see the module docstring.
+    """
+
+    def __init__(
+        self,
+        api_key: str | None = None,
+        model: str = "gpt-5",
+        language: str | None = None,
+        cache: ResultCache | None = None,
+        concurrency: int = 8,
+        queue_size: int = 64,
+        fast_path: bool = True,
+        max_attempts: int = 3,
+        hedge_model: str | None = None,
+        hedge_delay: float = 15.0,
+        cascade: Sequence[str] = (),
+        max_body: int = 1024 * 1024,
+    ):
+        self.api_key = api_key
+        self.model = model
+        self.language = language
+        self.cache = cache
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self.fast_path = fast_path
+        self.max_attempts = max_attempts
+        self.hedge_model = hedge_model
+        self.hedge_delay = hedge_delay
+        self.cascade = cascade
+        self.max_body = max_body
+        self.stats = ServerStats()
+        self.started = time.time()
+        self._queue: asyncio.Queue[_Job] = asyncio.Queue()
+        self._in_flight = 0
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 8765, socket: str | None = None):
+        """Warm up the converter and serve until cancelled"""
+        # import the LLM client libraries now rather than on the first request
+        for module in ("litellm", "promptic"):
+            importlib.import_module(module)
+
+        from text2ics.converter import load_environment
+
+        load_environment()
+        workers = [asyncio.create_task(self._work()) for _ in range(self.concurrency)]
+        if socket is not None:
+            server = await asyncio.start_unix_server(self._handle, path=socket)
+        else:
+            server = await asyncio.start_server(self._handle, host, port)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            for worker in workers:
+                worker.cancel()
+
+    def metrics(self) -> dict[str, Any]:
+        from text2ics.converter import conversion_stats
+
+        return {
+            "uptime": time.time() - self.started,
+            "queue_depth": self._queue.qsize(),
+            "queue_size": self.queue_size,
+            "in_flight": self._in_flight,
+            "concurrency": self.concurrency,
+            "received": self.stats.received,
+            "completed": self.stats.completed,
+            "failed": self.stats.failed,
+            "rejected": self.stats.rejected,
+            "bad_requests": self.stats.bad_requests,
+            "latency": self.stats.latency_percentiles(),
+            "limiter": asdict(default_limiter.stats),
+            "conversions": asdict(conversion_stats),
+            "cache": asdict(self.cache.stats) if self.cache is not None else None,
+        }
+
+    async def _work(self) -> None:
+        from text2ics.converter import aprocess_content
+
+        while True:
+            job = await self._queue.get()
+            if job.future.cancelled():  # the client went away while queued
+                continue
+            self._in_flight += 1
+            try:
+                result = await aprocess_content(
+                    content=job.content,
+                    api_key=self.api_key,
+                    model=job.model,
+                    language=job.language,
+                    cache=self.cache,
+                    fast_path=self.fast_path,
+                    max_attempts=self.max_attempts,
+                    hedge_model=self.hedge_model,
+                    hedge_delay=self.hedge_delay,
+                    cascade=self.cascade,
+                )
+            except Exception as e:
+                if not job.future.done():
+                    job.future.set_exception(e)
+            else:
+                if not job.future.done():
+                    job.future.set_result(result)
+            finally:
+                self._in_flight -= 1
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Serve the requests of one connection until either side closes it"""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    await self._send(writer, Response.error(HTTPStatus.BAD_REQUEST, "Bad request"))
+                    break
+
+                headers: dict[str, str] = {}
+                while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                try:
+                    length = int(headers.get("content-length") or 0)
+                except ValueError:
+                    await self._send(writer, Response.error(HTTPStatus.BAD_REQUEST, "Bad length"))
+                    break
+                if length > self.max_body:
+                    response = Response.error(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Body too large")
+                    await self._send(writer, response, keep_alive=False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                response = await self._route(method, target, headers, body)
+                keep_alive = (
+                    version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                )
+                await self._send(writer, response, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _send(
+        self, writer: asyncio.StreamWriter, response: Response, keep_alive: bool = True
+    ) -> None:
+        headers = {
+            "Content-Type": response.content_type,
+            "Content-Length": str(len(response.body)),
+            "Connection": "keep-alive" if keep_alive else "close",
+            **response.headers,
+        }
+        head = f"HTTP/1.1 {response.status.value} {response.status.phrase}\r\n"
+        head += "".join(f"{name}: {value}\r\n" for name, value in headers.items())
+        writer.write(head.encode("latin-1") + b"\r\n" + response.body)
+        await writer.drain()
+
+    async def _route(
+        self, method: str, target: str, headers: dict[str, str], body: bytes
+    ) -> Response:
+        url = urlsplit(target)
+        if url.path == "/health":
+            return Response.json({"status": "ok"})
+        if url.path == "/metrics":
+            return Response.json(self.metrics())
+        if url.path != "/convert":
+            return Response.error(HTTPStatus.NOT_FOUND, f"No such endpoint: {url.path}")
+        if method != "POST":
+            return Response.error(HTTPStatus.METHOD_NOT_ALLOWED, "Use POST", Allow="POST")
+        return await self._convert(parse_qs(url.query), headers, body)
+
+    async def _convert(
+        self, query: dict[str, list[str]], headers: dict[str, str], body: bytes
+    ) -> Response:
+        self.stats.received += 1
+        try:
+            options = {name: values[-1] for name, values in query.items()}
+            if headers.get("content-type", "").startswith("application/json"):
+                options |= json.loads(body)
+            else:
+                options["text"] = body.decode("utf-8")
+            content = options["text"]
+        except (ValueError, KeyError, TypeError):
+            self.stats.bad_requests += 1
+            return Response.error(HTTPStatus.BAD_REQUEST, "Expected text or JSON with 'text'")
+        model, language = options.get("model"), options.get("language")
+        if not isinstance(content, str) or not all(
+            isinstance(value, str | None) for value in (model, language)
+        ):
+            self.stats.bad_requests += 1
+            return Response.error(
+                HTTPStatus.BAD_REQUEST, "'text', 'model' and 'language' must be strings"
+            )
+
+        job = _Job(
+            content=content,
+            model=model or self.model,
+            language=language or self.language,
+            future=asyncio.get_running_loop().create_future(),
+        )
+        # jobs the workers took off the queue count too, so a burst is admitted up to the
+        # free workers plus the queue before the workers got to run
+        if self._in_flight + self._queue.qsize() >= self.concurrency + self.queue_size:
+            self.stats.rejected += 1
+            return Response.error(
+                HTTPStatus.SERVICE_UNAVAILABLE, "Queue full", **{"Retry-After": "1"}
+            )
+        self._queue.put_nowait(job)
+
+        start = time.perf_counter()
+        try:
+            result = await job.future
+        except Exception as e:
+            self.stats.failed += 1
+            return Response.error(HTTPStatus.BAD_GATEWAY, str(e) or type(e).__name__)
+        finally:
+            # no-op once done; drops the job if still queued when this handler is cancelled
+            job.future.cancel()
+        self.stats.completed += 1
+        self.stats.latencies.append(time.perf_counter() - start)
+
+        if "application/json" in headers.get("accept", ""):
+            return Response.json(
+                {
+                    "ics": result.ics.decode("utf-8"),
+                    "events": result.event_count,
+                    "profile": result.profile.to_dict(),
+                }
+            )
+        return Response(HTTPStatus.OK, result.ics, "text/calendar; charset=utf-8")
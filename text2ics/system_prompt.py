@@ -17,8 +17,9 @@ DETECTION
 
 NORMALIZATION
 - Timezone: Europe/Copenhagen for local date-times.
-- Missing year: use the next occurrence relative to now in Europe/Copenhagen;
-  if a listed month/day has already passed this year, roll to next year.
+- Missing year: use the next occurrence relative to the REFERENCE_DATE line when
+  given, otherwise relative to now in Europe/Copenhagen; if a listed month/day has
+  already passed that year, roll to the next year.
 - Missing time: make an all-day event using DATE values:
   - DTSTART;VALUE=DATE: YYYYMMDD
   - DTEND;VALUE=DATE: YYYYMMDD (exclusive; set to next day)
@@ -41,3 +42,19 @@ X-WR-TIMEZONE:Europe/Copenhagen
 ... one VEVENT per detected event ...
 END:VCALENDAR
 """
+
+# Task instructions, sent as a second system message. Together with the prompt above they
+# are the same for every request, so providers can cache them as a prompt prefix; only
+# the user message that follows varies.
+extract_instructions = """TASK
+Extract the events from the <INPUT>...</INPUT> section of the user message and output
+a raw ICS text block containing all events described in the text, in the language
+given by its OUTPUT_LANGUAGE line.
+"""
+
+fix_instructions = """TASK
+The user message lists VEVENTs extracted from the <INPUT> excerpts that are invalid,
+each in an <EVENT> section followed by its <PROBLEMS>. Fix the listed problems using
+the excerpts and output a raw ICS VCALENDAR containing only the corrected VEVENTs, one
+per <EVENT> and keeping its UID, in the language given by the OUTPUT_LANGUAGE line.
+"""